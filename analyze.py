@@ -0,0 +1,291 @@
+"""Пакетный анализ позиций с выводом в формате JSON Lines.
+
+Каждая строка входа описывает позицию: строку позиции (Board.to_position,
+например 'rwaqkawr/pppppppp/8/8/8/8/PPPPPPPP/RWAQKAWR w chess') или путь
+к файлу партии, сохраненному командой save, и (необязательно) число
+полуходов, которые нужно из него переиграть. Для каждой позиции вычисляются возможные ходы стороны, которая
+ходит, карта угроз и (по желанию) оценка перебором. Работа распределяется
+по пулу процессов, результаты выводятся в порядке входных строк.
+
+С флагом --shared-memory строки позиций разбираются в основном процессе и
+передаются обработчикам через общую память (shared_pool.PositionPool),
+файлы партий переигрывают сами обработчики, а результаты возвращаются
+через кольцевой буфер (shared_pool.ResultRing). Флаг --check-shared
+прогоняет вход обоими способами и сообщает о различиях в выводе.
+
+Пример запуска:
+    python analyze.py positions.txt --depth 2 --workers 8 > analysis.jsonl
+    find games -name '*.txt' | python analyze.py --game-type chess
+    python analyze.py positions.txt --check-shared
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait
+from itertools import zip_longest
+
+from chess import CheckersGame, Game, parse_saved_move
+from shared_pool import PositionPool, ResultRing
+
+RING_CAPACITY = 1 << 22  # Байт в кольцевом буфере результатов
+
+
+def new_game(game_type, size=8):
+    """Создает новую партию указанного типа и размера."""
+    if game_type == 'checkers':
+        return CheckersGame(height=size, width=size)
+    return Game(height=size, width=size)
+
+
+def is_position_string(spec):
+    """Проверяет, похожа ли строка входа на строку позиции."""
+    parts = spec.split()
+    return len(parts) == 3 and '/' in parts[0] and parts[1] in ('w', 'b') and parts[2] in ('chess', 'checkers')
+
+
+def load_position(spec, game_type='chess', size=8):
+    """Восстанавливает позицию по строке входа.
+
+    Args:
+        spec (str): Строка позиции или '<файл партии> [число полуходов]'.
+        game_type (str): Тип игры (для файлов партий).
+        size (int): Размер доски (для файлов партий).
+
+    Returns:
+        Game: Партия в нужной позиции.
+    """
+    if is_position_string(spec):
+        return Game.from_position(spec)
+    parts = spec.rsplit(None, 1)
+    if len(parts) == 2 and parts[1].isdigit():
+        filename, plies = parts[0], int(parts[1])
+    else:
+        filename, plies = spec, None
+    game = new_game(game_type, size)
+    with open(filename, 'r') as file:
+        for line in file:
+            if plies is not None and game.move_count >= plies:
+                break
+            if not line.strip():
+                continue
+            piece, start, end = parse_saved_move(line)
+            game.board.make_move(start, end)
+            game.move_count += 1
+            game.turn = 'black' if game.turn == 'white' else 'white'
+    if plies is not None and game.move_count < plies:
+        raise ValueError(f"В партии только {game.move_count} полуходов")
+    return game
+
+
+def analyse_game(game, depth=0):
+    """Анализирует позицию партии.
+
+    Returns:
+        dict: Ходы, карта угроз и, если depth > 0, оценка и лучший ход.
+    """
+    moves = {}
+    for start, end in game.legal_moves():
+        moves.setdefault(start, []).append(end)
+    result = {
+        'turn': game.turn,
+        'ply': game.move_count,
+        'moves': moves,
+        'threats': game.attack_map(),
+    }
+    if depth > 0:
+        score, best = game.search(depth)
+        result['score'] = score
+        result['best'] = f"{best[0]} {best[1]}" if best else None
+        result['depth'] = depth
+    return result
+
+
+def analyse_line(line, game_type='chess', size=8, depth=0):
+    """Анализирует одну строку входа и возвращает строку JSON."""
+    try:
+        result = analyse_game(load_position(line, game_type, size), depth)
+    except (OSError, ValueError, IndexError) as error:
+        return error_line(line, error)
+    return json.dumps(dict({'input': line}, **result), ensure_ascii=False)
+
+
+def error_line(line, error):
+    """Возвращает строку JSON с ошибкой разбора строки входа."""
+    return json.dumps({'input': line, 'error': str(error)}, ensure_ascii=False)
+
+
+def analyse_chunk(lines, game_type, size, depth):
+    """Анализирует пачку строк в процессе пула."""
+    return [analyse_line(line, game_type, size, depth) for line in lines]
+
+
+def chunks(lines, size):
+    """Разбивает поток строк на пачки, пропуская пустые строки."""
+    chunk = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        chunk.append(line)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def analyse_stream(lines, game_type='chess', size=8, depth=0, workers=None, chunksize=64):
+    """Анализирует поток строк параллельно, сохраняя порядок.
+
+    В работе одновременно находится ограниченное число пачек, поэтому
+    вход может быть сколь угодно длинным.
+
+    Yields:
+        str: Строки JSON в порядке входа.
+    """
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        limit = 4 * workers
+        pending = deque()
+        for chunk in chunks(lines, chunksize):
+            pending.append(pool.submit(analyse_chunk, chunk, game_type, size, depth))
+            if len(pending) >= limit:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+_shared = {}  # Пул позиций и буфер результатов в процессе-обработчике
+
+
+def init_shared_worker(pool_name, ring_name, lock):
+    """Подключает процесс пула к общей памяти."""
+    _shared['pool'] = PositionPool(name=pool_name)
+    _shared['ring'] = ResultRing(lock=lock, name=ring_name)
+
+
+def analyse_slots(tasks, game_type, size, depth):
+    """Анализирует позиции и пишет результаты в кольцевой буфер.
+
+    Args:
+        tasks (list): Пары (номер ячейки, строка входа). Если строка входа
+            None, позиция уже записана в ячейку; иначе это файл партии,
+            который переигрывается здесь, а ячейка служит номером результата.
+    """
+    pool, ring = _shared['pool'], _shared['ring']
+    for slot, spec in tasks:
+        try:
+            game = pool.get_game(slot) if spec is None else load_position(spec, game_type, size)
+            result = analyse_game(game, depth)
+        except (OSError, ValueError, IndexError) as error:
+            result = {'error': str(error)}
+        ring.write(slot, json.dumps(result, ensure_ascii=False).encode('utf-8'))
+    return len(tasks)
+
+
+def analyse_stream_shared(lines, game_type='chess', size=8, depth=0, workers=None, chunksize=64):
+    """Как analyse_stream, но позиции передаются через общую память.
+
+    Yields:
+        str: Строки JSON в порядке входа.
+    """
+    workers = workers or os.cpu_count() or 1
+    limit = 4 * workers
+    lock = multiprocessing.Lock()
+    with PositionPool(limit * chunksize) as pool, ResultRing(RING_CAPACITY, lock) as ring, \
+            ProcessPoolExecutor(workers, initializer=init_shared_worker,
+                                initargs=(pool.name, ring.name, lock)) as executor:
+        free = deque(range(pool.slots))
+        results = {}
+
+        def finish(chunk, items, future):
+            # Пока задача выполняется, буфер нужно разгружать, иначе обработчик встанет.
+            while not future.done():
+                results.update(ring.read())
+                wait([future], timeout=0.005)
+            future.result()
+            results.update(ring.read())
+            for line, item in zip(chunk, items):
+                if isinstance(item, str):
+                    yield item
+                else:
+                    free.append(item)
+                    data = results.pop(item).decode('utf-8')
+                    yield f"{{\"input\": {json.dumps(line, ensure_ascii=False)}, {data[1:]}"
+
+        pending = deque()
+        for chunk in chunks(lines, chunksize):
+            items, tasks = [], []
+            for line in chunk:
+                slot = free[0]
+                if is_position_string(line):
+                    try:
+                        pool.put_position(slot, line)
+                    except (ValueError, IndexError) as error:
+                        items.append(error_line(line, error))
+                        continue
+                    tasks.append((slot, None))
+                else:
+                    # Файл партии читает и переигрывает обработчик.
+                    tasks.append((slot, line))
+                free.popleft()
+                items.append(slot)
+            pending.append((chunk, items, executor.submit(analyse_slots, tasks, game_type, size, depth)))
+            if len(pending) >= limit:
+                yield from finish(*pending.popleft())
+        while pending:
+            yield from finish(*pending.popleft())
+
+
+def compare_streams(lines, game_type='chess', size=8, depth=0, workers=None, chunksize=64):
+    """Анализирует строки обоими способами и сравнивает вывод.
+
+    Returns:
+        list: Пары (строка analyse_stream, строка analyse_stream_shared),
+            которые не совпали.
+    """
+    lines = list(lines)
+    plain = analyse_stream(lines, game_type, size, depth, workers, chunksize)
+    shared = analyse_stream_shared(lines, game_type, size, depth, workers, chunksize)
+    return [(expected, actual) for expected, actual in zip_longest(plain, shared) if expected != actual]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетный анализ позиций в формате JSON Lines.")
+    parser.add_argument('input', nargs='?',
+                        help="файл со строками позиций или '<файл партии> [полуходов]' (по умолчанию stdin)")
+    parser.add_argument('--game-type', choices=['chess', 'checkers'], default='chess')
+    parser.add_argument('--size', type=int, default=8, help="размер доски")
+    parser.add_argument('--depth', type=int, default=0, help="глубина перебора для оценки (0 — без оценки)")
+    parser.add_argument('--workers', type=int, default=None, help="число процессов")
+    parser.add_argument('--chunksize', type=int, default=64, help="позиций в одной задаче")
+    parser.add_argument('--shared-memory', action='store_true',
+                        help="передавать позиции обработчикам через общую память")
+    parser.add_argument('--check-shared', action='store_true',
+                        help="сравнить вывод обычного режима и --shared-memory")
+    args = parser.parse_args(argv)
+
+    source = open(args.input, 'r') if args.input else sys.stdin
+    try:
+        if args.check_shared:
+            differences = compare_streams(source, args.game_type, args.size, args.depth,
+                                          args.workers, args.chunksize)
+            for expected, actual in differences:
+                print(f"- {expected}\n+ {actual}")
+            print(f"Различий: {len(differences)}")
+            return 1 if differences else 0
+        stream = analyse_stream_shared if args.shared_memory else analyse_stream
+        for line in stream(source, args.game_type, args.size, args.depth, args.workers, args.chunksize):
+            sys.stdout.write(line + '\n')
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+"""Регрессионные бенчмарки правил, отрисовки и сохранения партий.
+
+Каждый сценарий запускается несколько раз, в зачет идет лучшее время одной
+операции. Результаты сравниваются с базовыми значениями из JSON-файла;
+если какой-то сценарий замедлился сильнее порога, программа завершается
+с кодом 1.
+
+Пример запуска:
+    python benchmarks.py                  # сравнить с benchmarks_baseline.json
+    python benchmarks.py --save           # записать новые базовые значения
+    python benchmarks.py --filter threats --threshold 0.5
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+from chess import PIECE_CLASSES, Board, Checker, CheckersGame, Game, KingChecker
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks_baseline.json')
+DEFAULT_THRESHOLD = 0.3
+LONG_GAME_MOVES = 10000
+# Сценарии быстрее SHORT_CALL секунд на вызов сильнее всего страдают от шума
+# планировщика, поэтому для них серий в SHORT_CALL_REPEAT раз больше.
+SHORT_CALL = 1e-5
+SHORT_CALL_REPEAT = 3
+
+
+def piece_board(symbol, game_type='chess', size=8):
+    """Доска с фигурой на d4 в начальной расстановке указанной игры."""
+    board = Board(game_type, size, size)
+    row, col = board.parse_position('d4')
+    board.board[row][col] = symbol
+    return board
+
+
+def sparse_game():
+    """Партия с почти пустой доской: короли и несколько дальнобойных фигур."""
+    game = Game()
+    game.board.board = [['.'] * 8 for _ in range(8)]
+    for pos, symbol in (('e1', 'K'), ('e8', 'k'), ('d1', 'Q'), ('a8', 'r'), ('c3', 'D'), ('f6', 'a'), ('e4', 'P')):
+        row, col = game.board.parse_position(pos)
+        game.board.board[row][col] = symbol
+    return game
+
+
+def long_game(moves=LONG_GAME_MOVES):
+    """Партия из заданного числа ходов: волшебники ходят туда и обратно."""
+    game = Game()
+    cycle = [('b1', 'c3'), ('b8', 'c6'), ('c3', 'b1'), ('c6', 'b8')]
+    for index in range(moves):
+        game.board.make_move(*cycle[index % len(cycle)])
+    return game
+
+
+def movegen_case(piece_class, symbol, game_type='chess', size=8):
+    """Генерация ходов фигуры, стоящей на d4 в начальной расстановке."""
+    board = piece_board(symbol, game_type, size)
+    piece = piece_class('white' if symbol.isupper() else 'black', 'd4')
+    return lambda: piece.get_possible_moves(board)
+
+
+def quiet(function, *args):
+    """Вызывает функцию, подавляя вывод в терминал."""
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            function(*args)
+    return run
+
+
+def save_load_case(directory):
+    """Сохранение и загрузка партии из LONG_GAME_MOVES ходов."""
+    game = long_game()
+    filename = os.path.join(directory, 'long_game.txt')
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            game.save_game(filename)
+            Game().load_game(filename)
+    return run
+
+
+def build_cases(directory):
+    """Возвращает словарь {имя сценария: функция без аргументов}."""
+    cases = {}
+    for letter, piece_class in PIECE_CLASSES.items():
+        cases[f"movegen.{piece_class.__name__}"] = movegen_case(piece_class, letter.upper())
+    cases['movegen.Checker'] = movegen_case(Checker, 'W', 'checkers')
+    cases['movegen.KingChecker'] = movegen_case(KingChecker, 'K', 'checkers')
+    # Стоимость генерации не должна расти вместе с площадью доски.
+    cases['movegen.Queen.16x16'] = movegen_case(PIECE_CLASSES['q'], 'Q', size=16)
+    cases['movegen.Wizard.16x16'] = movegen_case(PIECE_CLASSES['w'], 'W', size=16)
+    cases['movegen.KingChecker.10x10'] = movegen_case(KingChecker, 'K', 'checkers', size=10)
+
+    dense = Game()
+    dense.board.make_move('e2', 'e4')
+    sparse = sparse_game()
+    checkers = CheckersGame()
+    cases['threats.dense'] = quiet(dense.threats, 'e4')
+    cases['threats.sparse'] = quiet(sparse.threats, 'e4')
+    cases['threats.checkers'] = quiet(checkers.threats, 'd4')
+    cases['hint.dense'] = quiet(dense.hint, 'd1')
+    cases['hint.sparse'] = quiet(sparse.hint, 'd1')
+    cases['print_board'] = quiet(dense.board.print_board)
+    cases['print_board.highlight'] = quiet(dense.board.print_board, [(4, 4), (5, 5), (6, 6)])
+    cases['save_load.10k'] = save_load_case(directory)
+    return cases
+
+
+def calibrate(function, min_time=0.1):
+    """Подбирает число вызовов в серии так, чтобы серия длилась не меньше min_time секунд.
+
+    Returns:
+        tuple: (число вызовов в серии, время одного вызова в первой такой серии).
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return number, elapsed / number
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+
+def run_series(function, number):
+    """Возвращает среднее время одного вызова в серии из number вызовов."""
+    start = time.perf_counter()
+    for _ in range(number):
+        function()
+    return (time.perf_counter() - start) / number
+
+
+def run(name_filter=None, repeat=5):
+    """Запускает сценарии и возвращает {имя: секунды на операцию}.
+
+    Серии разных сценариев чередуются по кругам, поэтому замеры каждого
+    сценария разнесены по всему запуску и кратковременное замедление машины
+    не портит их все сразу. Сценариям короче SHORT_CALL достается в
+    SHORT_CALL_REPEAT раз больше кругов.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        cases = {name: function for name, function in build_cases(directory).items()
+                 if not name_filter or name_filter in name}
+        plan = {}
+        for name, function in cases.items():
+            number, results[name] = calibrate(function)
+            rounds = repeat * SHORT_CALL_REPEAT if results[name] < SHORT_CALL else repeat
+            plan[name] = (number, rounds)
+        for round_index in range(1, repeat * SHORT_CALL_REPEAT):
+            for name, (number, rounds) in plan.items():
+                if round_index < rounds:
+                    results[name] = min(results[name], run_series(cases[name], number))
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Сравнивает результаты с базовыми значениями.
+
+    Returns:
+        list: Имена сценариев, замедлившихся больше чем на threshold.
+    """
+    regressions = []
+    for name, seconds in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:28} {seconds * 1e6:12.1f} us   (нет базового значения)")
+            continue
+        ratio = seconds / base
+        mark = ''
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            mark = '  РЕГРЕССИЯ'
+        print(f"{name:28} {seconds * 1e6:12.1f} us   {ratio:6.2f}x{mark}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Регрессионные бенчмарки chess.py.")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="файл базовых значений (JSON)")
+    parser.add_argument('--save', action='store_true', help="записать результаты как базовые")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="допустимое относительное замедление (0.3 = 30%%)")
+    parser.add_argument('--filter', default=None, help="запускать только сценарии с этой подстрокой")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    results = run(args.filter, args.repeat)
+    if args.save:
+        baseline = {}
+        if args.filter and os.path.exists(args.baseline):
+            with open(args.baseline) as file:
+                baseline = json.load(file)
+        baseline.update(results)
+        with open(args.baseline, 'w') as file:
+            json.dump(dict(sorted(baseline.items())), file, indent=2)
+            file.write('\n')
+        for name, seconds in results.items():
+            print(f"{name:28} {seconds * 1e6:12.1f} us")
+        print(f"Базовые значения сохранены в {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"Файл {args.baseline} не найден. Запустите с --save, чтобы создать его.")
+        return 1
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"Замедление больше {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print("Регрессий не обнаружено.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
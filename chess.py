@@ -1,35 +1,269 @@
+import argparse
+import atexit
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+MAX_BOARD_SIZE = 26  # Вертикали обозначаются буквами a-z
+SAVED_MOVE_PATTERN = re.compile(r'^(.)([a-z]\d+)([a-z]\d+)$')
+
+
+def square_name(row, col, height=8):
+    """Преобразует координаты доски в шахматную нотацию (например, 'e2')."""
+    return f"{chr(col + ord('a'))}{height - row}"
+
+
+@lru_cache(maxsize=4096)
+def parse_square(pos, height=8):
+    """Преобразует шахматную нотацию (например, 'e2') в координаты (строка, столбец).
+
+    Результат кэшируется: одни и те же клетки разбираются при каждом ходе.
+    """
+    return height - int(pos[1:]), ord(pos[0].lower()) - ord('a')
+
+
+def parse_saved_move(line):
+    """Разбирает строку файла партии вида 'Pe2e4' или 'Wa10b9'.
+
+    Args:
+        line (str): Строка файла, сохраненного Game.save_game.
+
+    Returns:
+        tuple: (фигура, начальная позиция, конечная позиция).
+    """
+    match = SAVED_MOVE_PATTERN.match(line.strip())
+    if match is None:
+        raise ValueError(f"Неверная запись хода: {line.strip()!r}")
+    return match.groups()
+
+
+KNIGHT_LEAPS = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
+KING_LEAPS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+ORTHOGONAL = ((-1, 0), (1, 0), (0, -1), (0, 1))
+DIAGONAL = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+
+# Описания шахматных фигур. symbol — символ фигуры (у белых в верхнем регистре,
+# у черных в нижнем), value — ее стоимость для оценки позиции. Ходы задаются
+# смещениями (строка, столбец):
+#   leaps    — прыжок на одну клетку по смещению (ход или взятие),
+#   rides    — движение по направлению до первой занятой клетки,
+#   captures — прыжок, допустимый только для взятия фигуры противника.
+# Порядок описаний задает порядок плоскостей в evaluation.PLANE_SYMBOLS.
+PIECE_DEFINITIONS = {
+    # Пешка ходит по особым правилам, ее класс Pawn написан вручную
+    'Pawn': {'symbol': 'p', 'value': 100},
+    'Knight': {'doc': "Класс, представляющий коня.", 'symbol': 'h', 'value': 300, 'leaps': KNIGHT_LEAPS},
+    'Bishop': {'doc': "Класс, представляющий слона.", 'symbol': 'b', 'value': 320, 'rides': DIAGONAL},
+    'Rook': {'doc': "Класс, представляющий ладью.", 'symbol': 'r', 'value': 500, 'rides': ORTHOGONAL},
+    'Queen': {'doc': "Класс, представляющий ферзя.", 'symbol': 'q', 'value': 900,
+              'rides': ORTHOGONAL + DIAGONAL},
+    'King': {'doc': "Класс, представляющий короля.", 'symbol': 'k', 'value': 20000, 'leaps': KING_LEAPS},
+    # Волшебник ходит как конь и как король
+    'Wizard': {'doc': "Класс, представляющий волшебника.", 'symbol': 'w', 'value': 450,
+               'leaps': KNIGHT_LEAPS + KING_LEAPS},
+    # Дракон ходит как ладья и как конь
+    'Dragon': {'doc': "Класс, представляющий дракона.", 'symbol': 'd', 'value': 800,
+               'rides': ORTHOGONAL, 'leaps': KNIGHT_LEAPS},
+    # Стрелок ходит как слон и "стреляет" на две клетки по диагонали через фигуры
+    'Archer': {'doc': "Класс, представляющий стрелка.", 'symbol': 'a', 'value': 350, 'rides': DIAGONAL,
+               'captures': ((-2, -2), (-2, 2), (2, -2), (2, 2))},
+}
+PIECE_SYMBOLS = ''.join(definition['symbol'] for definition in PIECE_DEFINITIONS.values())
+
+POSITION_SYMBOLS = {
+    'chess': frozenset(PIECE_SYMBOLS.upper() + PIECE_SYMBOLS + '.'),
+    'checkers': frozenset('WKbk.'),
+}
+EMPTY_RUN_PATTERN = re.compile(r'\.+')
+RANK_TOKEN_PATTERN = re.compile(r'\d+|\D')
+
+
+@lru_cache(maxsize=4096)
+def _parse_rank(rank, game_type):
+    """Разбирает горизонталь строки позиции ('3pp3' -> ('.', '.', '.', 'p', ...)).
+
+    Результат кэшируется: в больших наборах позиций горизонтали часто повторяются.
+    """
+    cells = []
+    for token in RANK_TOKEN_PATTERN.findall(rank):
+        if token.isdigit():
+            cells.extend('.' * int(token))
+        else:
+            cells.append(token)
+    if not cells or not POSITION_SYMBOLS[game_type].issuperset(cells):
+        raise ValueError(f"Неверная горизонталь {rank!r} для игры {game_type}")
+    return tuple(cells)
+
+
+@lru_cache(maxsize=4096)
+def _format_rank(rank):
+    """Записывает горизонталь, заменяя серии пустых клеток их числом ('...pp...' -> '3pp3')."""
+    return EMPTY_RUN_PATTERN.sub(lambda match: str(len(match.group())), rank)
+
+
+# Ключ стороны, которая ходит: входит в хэш позиции, когда ход черных.
+SIDE_KEY = random.Random('side').getrandbits(64)
+# Сколько полуходов без взятий и ходов пешками (простыми шашками) дают ничью.
+NO_PROGRESS_LIMITS = {'chess': 100, 'checkers': 50}
+PROGRESS_PIECES = {'chess': 'Pp', 'checkers': 'Wb'}
+
+
+@lru_cache(maxsize=None)
+def zobrist_keys(height, width):
+    """Возвращает случайные ключи Зобриста для доски заданного размера.
+
+    Returns:
+        dict: {символ: ключи по горизонталям и вертикалям}; у пустой клетки ключи нулевые.
+    """
+    rng = random.Random(height * (MAX_BOARD_SIZE + 1) + width)
+    symbols = sorted(set().union(*POSITION_SYMBOLS.values()) - {'.'})
+    keys = {symbol: [[rng.getrandbits(64) for _ in range(width)] for _ in range(height)] for symbol in symbols}
+    keys['.'] = [[0] * width for _ in range(height)]
+    return keys
+
+
+def parse_position_string(position):
+    """Разбирает и проверяет строку позиции (см. Board.to_position).
+
+    Args:
+        position (str): Строка позиции.
+
+    Returns:
+        tuple: (горизонтали сверху вниз, тип игры, чей ход).
+    """
+    try:
+        placement, side, game_type = position.split()
+    except ValueError:
+        raise ValueError(f"Неверная строка позиции: {position!r}") from None
+    if side not in ('w', 'b') or game_type not in POSITION_SYMBOLS:
+        raise ValueError(f"Неверная строка позиции: {position!r}")
+    rows = [_parse_rank(rank, game_type) for rank in placement.split('/')]
+    height, width = len(rows), len(rows[0])
+    if any(len(row) != width for row in rows):
+        raise ValueError(f"Горизонтали разной длины: {position!r}")
+    if not 4 <= height or not 4 <= width <= MAX_BOARD_SIZE:
+        raise ValueError(f"Недопустимый размер доски {width}x{height}.")
+    return rows, game_type, 'white' if side == 'w' else 'black'
+
+
+def chess_back_rank(width):
+    """Возвращает последнюю горизонталь черных для доски заданной ширины.
+
+    На широких досках между стрелками и ферзем с королем добавляются драконы.
+    """
+    extra = width - 8
+    left = ['r', 'w', 'a'] + ['d'] * (extra // 2)
+    right = ['d'] * (extra - extra // 2) + ['a', 'w', 'r']
+    return left + ['q', 'k'] + right
+
+
 class Board:
     """Класс, представляющий шахматную доску."""
 
-    def __init__(self, game_type='chess'):
-        """Инициализация доски, истории ходов и истории отмененных ходов."""
+    def __init__(self, game_type='chess', height=8, width=8):
+        """Инициализация доски, истории ходов и истории отмененных ходов.
+
+        Args:
+            game_type (str): Тип игры ('chess' или 'checkers').
+            height (int): Число горизонталей.
+            width (int): Число вертикалей.
+        """
+        if not 4 <= height or not 4 <= width <= MAX_BOARD_SIZE:
+            raise ValueError(f"Недопустимый размер доски {width}x{height}.")
+        if game_type == 'chess' and width < 8:
+            raise ValueError("Для шахмат нужна доска шириной не меньше 8.")
         self.game_type = game_type
+        self.height = height
+        self.width = width
         self.board = self.create_board()
         self.move_history = []
         self.redo_history = []
+        self.journal = None  # Journal, куда записываются ходы, отмены и повторы
+        self.reset_position_counts()
+
+    def reset_position_counts(self, turn='white'):
+        """Пересчитывает хэш позиции и начинает счет повторений заново.
+
+        Вызывается, если доску заполнили напрямую, минуя make_move.
+
+        Args:
+            turn (str): Чей ход в текущей позиции.
+        """
+        self.zobrist = keys = zobrist_keys(self.height, self.width)
+        self.hash = SIDE_KEY if turn == 'black' else 0
+        for row, cells in enumerate(self.board):
+            for col, symbol in enumerate(cells):
+                if symbol != '.':
+                    self.hash ^= keys[symbol][row][col]
+        self.position_counts = {self.hash: 1}
+        self.halfmove_clock = 0
+        self.clock_history = []
+
+    def _count_position(self, piece, captured_piece):
+        """Учитывает позицию после хода в счетчиках повторений и ходов без прогресса."""
+        self.clock_history.append(self.halfmove_clock)
+        if captured_piece != '.' or piece in PROGRESS_PIECES[self.game_type]:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+        self.position_counts[self.hash] = self.position_counts.get(self.hash, 0) + 1
+
+    def _uncount_position(self):
+        """Убирает текущую позицию из счетчиков перед отменой хода."""
+        count = self.position_counts[self.hash] - 1
+        if count:
+            self.position_counts[self.hash] = count
+        else:
+            del self.position_counts[self.hash]
+        self.halfmove_clock = self.clock_history.pop()
+
+    def repetitions(self):
+        """Возвращает, сколько раз текущая позиция встречалась в партии."""
+        return self.position_counts.get(self.hash, 0)
+
+    def draw_reason(self):
+        """Проверяет, закончилась ли партия вничью.
+
+        Returns:
+            str: Причина ничьей или None.
+        """
+        if self.repetitions() >= 3:
+            return "позиция повторилась три раза"
+        limit = NO_PROGRESS_LIMITS[self.game_type]
+        if self.halfmove_clock >= limit:
+            progress = "ходов пешками" if self.game_type == 'chess' else "ходов простыми шашками"
+            return f"{limit // 2} ходов без взятий и {progress}"
+        return None
+
+    def is_draw(self):
+        """Возвращает True, если позиция — ничья по повторению или без прогресса."""
+        return self.draw_reason() is not None
 
     def create_board(self):
         if self.game_type == 'chess':
-            return [
-                ['r', 'w', 'a', 'q', 'k', 'a', 'w', 'r'],
-                ['p', 'p', 'p', 'p', 'p', 'p', 'p', 'p'],
-                ['.', '.', '.', '.', '.', '.', '.', '.'],
-                ['.', '.', '.', '.', '.', '.', '.', '.'],
-                ['.', '.', '.', '.', '.', '.', '.', '.'],
-                ['.', '.', '.', '.', '.', '.', '.', '.'],
-                ['P', 'P', 'P', 'P', 'P', 'P', 'P', 'P'],
-                ['R', 'W', 'A', 'Q', 'K', 'A', 'W', 'R']
-            ]
+            back_rank = chess_back_rank(self.width)
+            board = [['.' for _ in range(self.width)] for _ in range(self.height)]
+            board[0] = back_rank
+            board[1] = ['p'] * self.width
+            board[-2] = ['P'] * self.width
+            board[-1] = [piece.upper() for piece in back_rank]
+            return board
         elif self.game_type == 'checkers':
-            board = [['.' for _ in range(8)] for _ in range(8)]
+            board = [['.' for _ in range(self.width)] for _ in range(self.height)]
+            rows = (self.height - 2) // 2  # 3 ряда на доске 8x8, 4 ряда на 10x10
             # Черные шашки (сверху)
-            for row in range(3):
-                for col in range(8):
+            for row in range(rows):
+                for col in range(self.width):
                     if (row + col) % 2 == 1:
                         board[row][col] = 'b'  # Обычная черная шашка
             # Белые шашки (снизу)
-            for row in range(5, 8):
-                for col in range(8):
+            for row in range(self.height - rows, self.height):
+                for col in range(self.width):
                     if (row + col) % 2 == 1:
                         board[row][col] = 'W'  # Обычная белая шашка
             return board
@@ -42,21 +276,24 @@ class Board:
         """
         if highlight is None:
             highlight = []
-        print("    Black")
-        print("    A B C D E F G H")
+        label = len(str(self.height))
+        indent = ' ' * (label + 3)
+        files = ' '.join(chr(ord('A') + j) for j in range(self.width))
+        print(f"{indent}Black")
+        print(f"{indent}{files}")
         print()
-        for i in range(8):
-            print(8 - i, end='   ')
-            for j in range(8):
+        for i in range(self.height):
+            print(f"{self.height - i:>{label}}", end='   ')
+            for j in range(self.width):
                 if (i, j) in highlight:
                     print(f"\033[46m{self.board[i][j]}\033[0m", end=' ')
                 else:
                     print(self.board[i][j], end=' ')
-            print(' ', 8 - i)
+            print(' ', self.height - i)
         print()
-        print("    A B C D E F G H")
-        print("    White")
-        print('-----------------------------')
+        print(f"{indent}{files}")
+        print(f"{indent}White")
+        print('-' * (2 * self.width + 13))
 
     def parse_position(self, pos):
         """Преобразует шахматную нотацию (например, 'e2') в координаты доски.
@@ -67,9 +304,11 @@ class Board:
         Returns:
             tuple: Координаты (строка, столбец).
         """
-        col = ord(pos[0].lower()) - ord('a')
-        row = 8 - int(pos[1])
-        return row, col
+        return parse_square(pos, self.height)
+
+    def square_name(self, row, col):
+        """Преобразует координаты доски в шахматную нотацию (например, 'e2')."""
+        return square_name(row, col, self.height)
 
     def make_move(self, start, end):
         """Выполняет ход фигуры с начальной позиции на конечную.
@@ -82,11 +321,15 @@ class Board:
         end_row, end_col = self.parse_position(end)
         piece = self.board[start_row][start_col]
         captured_piece = self.board[end_row][end_col]
+        keys = self.zobrist
+        # Хэш обновляется по клеткам, которые меняет ход: до хода и после него.
+        delta = keys[piece][start_row][start_col] ^ keys[captured_piece][end_row][end_col]
 
-        if abs(start_row - end_row) == 2:  # Если это взятие
+        if self.game_type == 'checkers' and abs(start_row - end_row) == 2:  # Если это взятие
             mid_row = (start_row + end_row) // 2
             mid_col = (start_col + end_col) // 2
             captured_piece = self.board[mid_row][mid_col]
+            delta ^= keys[captured_piece][mid_row][mid_col]
             self.board[mid_row][mid_col] = '.'
 
         self.move_history.append((start, end, piece, captured_piece))
@@ -95,8 +338,12 @@ class Board:
         self.redo_history.clear()
 
         if self.game_type == 'checkers':
-            if (piece == 'W' and end_row == 0) or (piece == 'b' and end_row == 7):
+            if (piece == 'W' and end_row == 0) or (piece == 'b' and end_row == self.height - 1):
                 self.board[end_row][end_col] = 'K' if piece.isupper() else 'k'
+        self.hash ^= delta ^ keys[self.board[end_row][end_col]][end_row][end_col] ^ SIDE_KEY
+        self._count_position(piece, captured_piece)
+        if self.journal is not None:
+            self.journal.append(f"m {start} {end}")
 
     def undo_move(self):
         """Отменяет последний ход."""
@@ -104,15 +351,22 @@ class Board:
             start, end, piece, captured_piece = self.move_history.pop()
             start_row, start_col = self.parse_position(start)
             end_row, end_col = self.parse_position(end)
-            if abs(start_row - end_row) == 2:  # Восстанавливаем взятую шашку
+            self._uncount_position()
+            keys = self.zobrist
+            delta = keys[self.board[end_row][end_col]][end_row][end_col] ^ keys[piece][start_row][start_col]
+            self.board[start_row][start_col] = piece
+            self.board[end_row][end_col] = captured_piece
+            if self.game_type == 'checkers' and abs(start_row - end_row) == 2:  # Восстанавливаем взятую шашку
                 mid_row = (start_row + end_row) // 2
                 mid_col = (start_col + end_col) // 2
                 self.board[mid_row][mid_col] = captured_piece
-
-            self.board[start_row][start_col] = piece
-            self.board[end_row][end_col] = captured_piece
+                self.board[end_row][end_col] = '.'
+                delta ^= keys[captured_piece][mid_row][mid_col]
+            self.hash ^= delta ^ keys[self.board[end_row][end_col]][end_row][end_col] ^ SIDE_KEY
 
             self.redo_history.append((start, end, piece, captured_piece))
+            if self.journal is not None:
+                self.journal.append('u')
 
     def redo_move(self):
         """Повторяет последний отмененный ход."""
@@ -120,15 +374,99 @@ class Board:
             start, end, piece, captured_piece = self.redo_history.pop()
             start_row, start_col = self.parse_position(start)
             end_row, end_col = self.parse_position(end)
-            if abs(start_row - end_row) == 2:  # Удаляем взятую шашку при redo
+            keys = self.zobrist
+            delta = keys[piece][start_row][start_col] ^ keys[self.board[end_row][end_col]][end_row][end_col]
+            if self.game_type == 'checkers' and abs(start_row - end_row) == 2:  # Удаляем взятую шашку при redo
                 mid_row = (start_row + end_row) // 2
                 mid_col = (start_col + end_col) // 2
+                delta ^= keys[self.board[mid_row][mid_col]][mid_row][mid_col]
                 self.board[mid_row][mid_col] = '.'
 
             self.board[end_row][end_col] = piece
             self.board[start_row][start_col] = '.'
+            if self.game_type == 'checkers':
+                if (piece == 'W' and end_row == 0) or (piece == 'b' and end_row == self.height - 1):
+                    self.board[end_row][end_col] = 'K' if piece.isupper() else 'k'
+            self.hash ^= delta ^ keys[self.board[end_row][end_col]][end_row][end_col] ^ SIDE_KEY
+            self._count_position(piece, captured_piece)
 
             self.move_history.append((start, end, piece, captured_piece))
+            if self.journal is not None:
+                self.journal.append('r')
+
+    def to_position(self, turn='white'):
+        """Записывает позицию в одну строку.
+
+        Формат похож на FEN: горизонтали сверху вниз через '/', серии пустых
+        клеток заменены их числом, затем сторона, которая ходит ('w' или 'b'),
+        и тип игры. Например: 'rwaqkawr/pppppppp/8/8/8/8/PPPPPPPP/RWAQKAWR w chess'.
+
+        Args:
+            turn (str): Чей ход ('white' или 'black').
+
+        Returns:
+            str: Строка позиции.
+        """
+        placement = '/'.join([_format_rank(''.join(row)) for row in self.board])
+        return f"{placement} {'w' if turn == 'white' else 'b'} {self.game_type}"
+
+    @classmethod
+    def from_position(cls, position):
+        """Создает доску по строке позиции (см. to_position).
+
+        Args:
+            position (str): Строка позиции.
+
+        Returns:
+            tuple: (доска, чей ход).
+        """
+        rows, game_type, turn = parse_position_string(position)
+        return cls.from_rows(rows, game_type, turn), turn
+
+    @classmethod
+    def from_rows(cls, rows, game_type, turn='white'):
+        """Создает доску по готовым горизонталям без проверки символов.
+
+        Args:
+            rows (list): Горизонтали сверху вниз (последовательности символов).
+            game_type (str): Тип игры ('chess' или 'checkers').
+            turn (str): Чей ход (нужен для хэша позиции).
+
+        Returns:
+            Board: Доска без истории ходов.
+        """
+        # Конструктор не вызывается, чтобы не строить начальную расстановку.
+        board = cls.__new__(cls)
+        board.game_type = game_type
+        board.height = len(rows)
+        board.width = len(rows[0])
+        board.board = [list(row) for row in rows]
+        board.move_history = []
+        board.redo_history = []
+        board.journal = None
+        board.reset_position_counts(turn)
+        return board
+
+    def copy(self):
+        """Возвращает копию доски без истории ходов.
+
+        Хэш и счетчик ходов без прогресса сохраняются, счет повторений начинается заново.
+        """
+        # Как и в from_rows, начальная расстановка не строится, а хэш не пересчитывается.
+        board = Board.__new__(Board)
+        board.game_type = self.game_type
+        board.height = self.height
+        board.width = self.width
+        board.board = [row[:] for row in self.board]
+        board.move_history = []
+        board.redo_history = []
+        board.journal = None
+        board.zobrist = self.zobrist
+        board.hash = self.hash
+        board.position_counts = {self.hash: 1}
+        board.halfmove_clock = self.halfmove_clock
+        board.clock_history = []
+        return board
 
 
 class Piece:
@@ -180,13 +518,14 @@ class Checker(Piece):
         if abs(start_col - end_col) == 1 and end_row - start_row == direction:
             return board.board[end_row][end_col] == '.'
 
-        # Взятие (любой фигуры)
+        # Взятие шашки противника
         if abs(start_col - end_col) == 2 and end_row - start_row == 2 * direction:
             mid_row = (start_row + end_row) // 2
             mid_col = (start_col + end_col) // 2
             return (
-                board.board[mid_row][mid_col] != '.' and  # Любая фигура в середине
-                board.board[end_row][end_col] == '.'      # Клетка назначения пуста
+                board.board[mid_row][mid_col] != '.' and  # В середине стоит шашка
+                board.board[mid_row][mid_col].isupper() != (self.color == 'white') and  # противника,
+                board.board[end_row][end_col] == '.'      # а клетка назначения пуста
             )
 
         return False
@@ -200,18 +539,18 @@ class Checker(Piece):
         # Обычные ходы
         for col_offset in [-1, 1]:
             new_row, new_col = start_row + direction, start_col + col_offset
-            if 0 <= new_row < 8 and 0 <= new_col < 8 and board.board[new_row][new_col] == '.':
-                moves.append(f"{chr(new_col + ord('a'))}{8 - new_row}")
+            if 0 <= new_row < board.height and 0 <= new_col < board.width and board.board[new_row][new_col] == '.':
+                moves.append(board.square_name(new_row, new_col))
 
         # Взятия
         for col_offset in [-2, 2]:
             new_row, new_col = start_row + 2 * direction, start_col + col_offset
-            if 0 <= new_row < 8 and 0 <= new_col < 8:
+            if 0 <= new_row < board.height and 0 <= new_col < board.width:
                 mid_row, mid_col = start_row + direction, start_col + col_offset // 2
                 if (board.board[mid_row][mid_col] != '.' and
-                        board.board[mid_row][mid_col].islower() != (self.color == 'white') and
+                        board.board[mid_row][mid_col].isupper() != (self.color == 'white') and
                         board.board[new_row][new_col] == '.'):
-                    moves.append(f"{chr(new_col + ord('a'))}{8 - new_row}")
+                    moves.append(board.square_name(new_row, new_col))
 
         return moves
 
@@ -231,7 +570,7 @@ class KingChecker(Piece):
         captured = 0
         while row != end_row:
             if board.board[row][col] != '.':
-                if captured or board.board[row][col].islower() == (self.color == 'white'):
+                if captured or board.board[row][col].isupper() == (self.color == 'white'):
                     return False
                 captured += 1
             row += row_step
@@ -245,17 +584,17 @@ class KingChecker(Piece):
         for row_step, col_step in [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
             row, col = start_row + row_step, start_col + col_step
             captured = 0
-            while 0 <= row < 8 and 0 <= col < 8:
+            while 0 <= row < board.height and 0 <= col < board.width:
                 if board.board[row][col] != '.':
-                    if captured or board.board[row][col].islower() == (self.color == 'white'):
+                    if captured or board.board[row][col].isupper() == (self.color == 'white'):
                         break
                     captured += 1
                     row += row_step
                     col += col_step
-                    if 0 <= row < 8 and 0 <= col < 8 and board.board[row][col] == '.':
-                        moves.append(f"{chr(col + ord('a'))}{8 - row}")
+                    if 0 <= row < board.height and 0 <= col < board.width and board.board[row][col] == '.':
+                        moves.append(board.square_name(row, col))
                     break
-                moves.append(f"{chr(col + ord('a'))}{8 - row}")
+                moves.append(board.square_name(row, col))
                 row += row_step
                 col += col_step
         return moves
@@ -281,7 +620,7 @@ class Pawn(Piece):
         if start_col == end_col:
             if start_row + direction == end_row and board.board[end_row][end_col] == '.':
                 return True
-            if (start_row == 1 or start_row == 6) and start_row + 2 * direction == end_row and board.board[end_row][end_col] == '.' and board.board[start_row + direction][start_col] == '.':
+            if start_row == (board.height - 2 if self.color == 'white' else 1) and start_row + 2 * direction == end_row and board.board[end_row][end_col] == '.' and board.board[start_row + direction][start_col] == '.':
                 return True
         # Диагональное взятие
         elif abs(start_col - end_col) == 1 and start_row + direction == end_row:
@@ -303,61 +642,110 @@ class Pawn(Piece):
         moves = []
         start_row, start_col = board.parse_position(self.position)
         direction = -1 if self.color == 'white' else 1
-        if 0 <= start_row + direction < 8 and board.board[start_row + direction][start_col] == '.':
-            moves.append(f"{chr(start_col + ord('a'))}{8 - (start_row + direction)}")
-            if (start_row == 1 or start_row == 6) and board.board[start_row + 2 * direction][start_col] == '.':
-                moves.append(f"{chr(start_col + ord('a'))}{8 - (start_row + 2 * direction)}")
+        if 0 <= start_row + direction < board.height and board.board[start_row + direction][start_col] == '.':
+            moves.append(board.square_name(start_row + direction, start_col))
+            if start_row == (board.height - 2 if self.color == 'white' else 1) and board.board[start_row + 2 * direction][start_col] == '.':
+                moves.append(board.square_name(start_row + 2 * direction, start_col))
         for col_offset in [-1, 1]:
-            if 0 <= start_col + col_offset < 8 and 0 <= start_row + direction < 8:
-                if board.board[start_row + direction][start_col + col_offset] != '.' and board.board[start_row + direction][start_col + col_offset].islower() != self.color == 'white':
-                    moves.append(f"{chr(start_col + col_offset + ord('a'))}{8 - (start_row + direction)}")
+            if 0 <= start_col + col_offset < board.width and 0 <= start_row + direction < board.height:
+                if board.board[start_row + direction][start_col + col_offset] != '.' and board.board[start_row + direction][start_col + col_offset].isupper() != (self.color == 'white'):
+                    moves.append(board.square_name(start_row + direction, start_col + col_offset))
         return moves
 
 
-class Knight(Piece):
-    """Класс, представляющий коня."""
+class MoveTables:
+    """Таблицы ходов фигуры для доски заданного размера.
 
-    def is_valid_move(self, board, end):
-        """Проверяет, является ли ход коня допустимым.
+    Для клетки таблица строится при первом обращении (square) и хранит цели
+    прыжков, лучи движения, цели взятий и словарь targets: конечная клетка ->
+    список троек (вид хода, луч или None, номер клетки на луче). Клетки луча
+    до этого номера должны быть пустыми; путь не копируется, поэтому таблица
+    клетки занимает O(H+W). Генерация и проверка хода сводятся к проходу по
+    готовым спискам, поэтому их стоимость зависит от подвижности фигуры, а не
+    от площади доски.
+    """
 
-        Args:
-            board (Board): Шахматная доска.
-            end (str): Конечная позиция.
+    def __init__(self, definition, height=8, width=8):
+        """Готовит пустые таблицы по описанию фигуры.
 
-        Returns:
-            bool: True, если ход допустим, иначе False.
+        Args:
+            definition (dict): Описание фигуры (см. PIECE_DEFINITIONS).
+            height (int): Число горизонталей доски.
+            width (int): Число вертикалей доски.
         """
-        start_row, start_col = board.parse_position(self.position)
-        end_row, end_col = board.parse_position(end)
-        if (abs(start_row - end_row) == 2 and abs(start_col - end_col) == 1) or (abs(start_row - end_row) == 1 and abs(start_col - end_col) == 2):
-            return board.board[end_row][end_col] == '.' or board.board[end_row][end_col].islower() != self.color == 'white'
-        return False
-
-    def get_possible_moves(self, board):
-        """Возвращает список возможных ходов для коня.
+        self.definition = definition
+        self.height = height
+        self.width = width
+        self.squares = [[None] * width for _ in range(height)]
+        self.names = [[(r, c, square_name(r, c, height)) for c in range(width)] for r in range(height)]
 
-        Args:
-            board (Board): Шахматная доска.
+    def square(self, row, col):
+        """Возвращает таблицу клетки, при необходимости строя ее.
 
         Returns:
-            list: Список возможных ходов.
+            tuple: (прыжки, лучи, взятия, targets).
         """
-        moves = []
-        start_row, start_col = board.parse_position(self.position)
-        for row_offset in [-2, -1, 1, 2]:
-            for col_offset in [-2, -1, 1, 2]:
-                if abs(row_offset) != abs(col_offset):
-                    new_row, new_col = start_row + row_offset, start_col + col_offset
-                    if 0 <= new_row < 8 and 0 <= new_col < 8 and self.is_valid_move(board, f"{chr(new_col + ord('a'))}{8 - new_row}"):
-                        moves.append(f"{chr(new_col + ord('a'))}{8 - new_row}")
-        return moves
-
-
-class Bishop(Piece):
-    """Класс, представляющий слона."""
+        table = self.squares[row][col]
+        if table is not None:
+            return table
+        height, width, names = self.height, self.width, self.names
+        definition = self.definition
+        targets = {}
+
+        leaps = []
+        for row_offset, col_offset in definition.get('leaps', ()):
+            r, c = row + row_offset, col + col_offset
+            if 0 <= r < height and 0 <= c < width:
+                leaps.append(names[r][c])
+                targets.setdefault((r, c), []).append(('move', None, 0))
+
+        rays = []
+        for row_step, col_step in definition.get('rides', ()):
+            ray = []
+            r, c = row + row_step, col + col_step
+            while 0 <= r < height and 0 <= c < width:
+                ray.append(names[r][c])
+                r, c = r + row_step, c + col_step
+            if ray:
+                ray = tuple(ray)
+                rays.append(ray)
+                for step, (r, c, _) in enumerate(ray):
+                    targets.setdefault((r, c), []).append(('move', ray, step))
+
+        captures = []
+        for row_offset, col_offset in definition.get('captures', ()):
+            r, c = row + row_offset, col + col_offset
+            if 0 <= r < height and 0 <= c < width:
+                captures.append(names[r][c])
+                targets.setdefault((r, c), []).append(('capture', None, 0))
+
+        table = self.squares[row][col] = (tuple(leaps), tuple(rays), tuple(captures), targets)
+        return table
+
+
+def compile_piece(name, definition):
+    """Создает класс фигуры с табличной генерацией ходов по ее описанию.
+
+    Args:
+        name (str): Имя класса.
+        definition (dict): Описание фигуры (см. PIECE_DEFINITIONS).
+
+    Returns:
+        type: Подкласс Piece.
+    """
+    # Таблицы строятся при первом ходе на доске такого размера, а таблица
+    # клетки — при первом ходе с нее, поэтому импорт модуля их не строит.
+    tables_by_size = {}
+
+    def tables_for(board):
+        key = (board.height, board.width)
+        tables = tables_by_size.get(key)
+        if tables is None:
+            tables = tables_by_size[key] = MoveTables(definition, *key)
+        return tables
 
     def is_valid_move(self, board, end):
-        """Проверяет, является ли ход слона допустимым.
+        """Проверяет, является ли ход фигуры допустимым.
 
         Args:
             board (Board): Шахматная доска.
@@ -368,20 +756,24 @@ class Bishop(Piece):
         """
         start_row, start_col = board.parse_position(self.position)
         end_row, end_col = board.parse_position(end)
-        if abs(start_row - end_row) == abs(start_col - end_col):
-            row_step = 1 if end_row > start_row else -1
-            col_step = 1 if end_col > start_col else -1
-            row, col = start_row + row_step, start_col + col_step
-            while row != end_row:
-                if board.board[row][col] != '.':
-                    return False
-                row += row_step
-                col += col_step
-            return board.board[end_row][end_col] == '.' or board.board[end_row][end_col].islower() != self.color == 'white'
+        tables = tables_by_size.get((board.height, board.width)) or tables_for(board)
+        table = tables.squares[start_row][start_col] or tables.square(start_row, start_col)
+        entries = table[3].get((end_row, end_col))
+        if not entries:
+            return False
+        cells = board.board
+        target = cells[end_row][end_col]
+        if target != '.' and target.isupper() == (self.color == 'white'):
+            return False
+        for kind, ray, step in entries:
+            if kind == 'capture' and target == '.':
+                continue
+            if ray is None or all(cells[row][col] == '.' for row, col, _ in ray[:step]):
+                return True
         return False
 
     def get_possible_moves(self, board):
-        """Возвращает список возможных ходов для слона.
+        """Возвращает список возможных ходов для фигуры.
 
         Args:
             board (Board): Шахматная доска.
@@ -389,366 +781,452 @@ class Bishop(Piece):
         Returns:
             list: Список возможных ходов.
         """
-        moves = []
         start_row, start_col = board.parse_position(self.position)
-        for row_step, col_step in [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
-            row, col = start_row + row_step, start_col + col_step
-            while 0 <= row < 8 and 0 <= col < 8:
-                if board.board[row][col] == '.':
-                    moves.append(f"{chr(col + ord('a'))}{8 - row}")
-                else:
-                    if board.board[row][col].islower() != self.color == 'white':
-                        moves.append(f"{chr(col + ord('a'))}{8 - row}")
-                    break
-                row += row_step
-                col += col_step
+        tables = tables_by_size.get((board.height, board.width)) or tables_for(board)
+        cells = board.board
+        white = self.color == 'white'
+        moves = []
+        leaps, rays, captures, _ = tables.squares[start_row][start_col] or tables.square(start_row, start_col)
+        for row, col, square in leaps:
+            target = cells[row][col]
+            if target == '.' or target.isupper() != white:
+                moves.append(square)
+        for ray in rays:
+            for row, col, square in ray:
+                target = cells[row][col]
+                if target == '.':
+                    moves.append(square)
+                    continue
+                if target.isupper() != white:
+                    moves.append(square)
+                break
+        for row, col, square in captures:
+            target = cells[row][col]
+            if target != '.' and target.isupper() != white and square not in moves:
+                moves.append(square)
         return moves
 
+    return type(name, (Piece,), {
+        '__doc__': definition.get('doc'),
+        'definition': definition,
+        'tables': tables_by_size,
+        'is_valid_move': is_valid_move,
+        'get_possible_moves': get_possible_moves,
+    })
 
-class Rook(Piece):
-    """Класс, представляющий ладью."""
 
-    def is_valid_move(self, board, end):
-        """Проверяет, является ли ход ладьи допустимым.
+def build_piece_classes(definitions):
+    """Создает классы шахматных фигур по их описаниям.
 
-        Args:
-            board (Board): Шахматная доска.
-            end (str): Конечная позиция.
+    Args:
+        definitions (dict): Описания фигур (см. PIECE_DEFINITIONS).
 
-        Returns:
-            bool: True, если ход допустим, иначе False.
-        """
-        start_row, start_col = board.parse_position(self.position)
-        end_row, end_col = board.parse_position(end)
-        if start_row == end_row:
-            for col in range(min(start_col, end_col) + 1, max(start_col, end_col)):
-                if board.board[start_row][col] != '.':
-                    return False
-            return board.board[end_row][end_col] == '.' or board.board[end_row][end_col].islower() != self.color == 'white'
-        elif start_col == end_col:
-            for row in range(min(start_row, end_row) + 1, max(start_row, end_row)):
-                if board.board[row][start_col] != '.':
-                    return False
-            return board.board[end_row][end_col] == '.' or board.board[end_row][end_col].islower() != self.color == 'white'
-        return False
+    Returns:
+        dict: {символ фигуры: класс фигуры}.
+    """
+    classes = {}
+    for name, definition in definitions.items():
+        classes[definition['symbol']] = Pawn if name == 'Pawn' else compile_piece(name, definition)
+    return classes
 
-    def get_possible_moves(self, board):
-        """Возвращает список возможных ходов для ладьи.
 
-        Args:
-            board (Board): Шахматная доска.
+PIECE_CLASSES = build_piece_classes(PIECE_DEFINITIONS)
+# Классы фигур остаются атрибутами модуля: chess.Knight, chess.Queen и т.д.
+globals().update({piece_class.__name__: piece_class for piece_class in PIECE_CLASSES.values()})
 
-        Returns:
-            list: Список возможных ходов.
-        """
-        moves = []
-        start_row, start_col = board.parse_position(self.position)
-        for row in range(8):
-            if row != start_row and self.is_valid_move(board, f"{chr(start_col + ord('a'))}{8 - row}"):
-                moves.append(f"{chr(start_col + ord('a'))}{8 - row}")
-        for col in range(8):
-            if col != start_col and self.is_valid_move(board, f"{chr(col + ord('a'))}{8 - start_row}"):
-                moves.append(f"{chr(col + ord('a'))}{8 - start_row}")
-        return moves
+# Стоимость фигур для оценки позиции (символ в нижнем регистре).
+PIECE_VALUES = {
+    'chess': {definition['symbol']: definition['value'] for definition in PIECE_DEFINITIONS.values()},
+    'checkers': {'w': 100, 'b': 100, 'k': 300},
+}
 
+SEARCH_DEPTH = 2  # Глубина перебора для команды best без готового результата
+EXPLORE_MAX_NODES = 20000  # Узлов дерева вариантов в памяти по умолчанию
+EXPLORE_PAGE = 20  # Ходов, которые команда ls (more) показывает за раз
 
-class Queen(Piece):
-    """Класс, представляющий ферзя."""
 
-    def is_valid_move(self, board, end):
-        """Проверяет, является ли ход ферзя допустимым.
+class SearchStopped(Exception):
+    """Перебор прерван по запросу."""
 
-        Args:
-            board (Board): Шахматная доска.
-            end (str): Конечная позиция.
 
-        Returns:
-            bool: True, если ход допустим, иначе False.
+class Game:
+    """Класс, управляющий шахматной игрой."""
+
+    def __init__(self, ponder=False, height=8, width=8, board=None):
+        """Инициализация игры.
+
+        Args:
+            ponder (bool): Анализировать позицию в фоне, пока игрок думает.
+            height (int): Число горизонталей доски.
+            width (int): Число вертикалей доски.
+            board (Board): Готовая доска вместо начальной расстановки.
         """
-        start_row, start_col = board.parse_position(self.position)
-        end_row, end_col = board.parse_position(end)
-        if start_row == end_row or start_col == end_col or abs(start_row - end_row) == abs(start_col - end_col):
-            return Rook.is_valid_move(self, board, end) or Bishop.is_valid_move(self, board, end)
-        return False
+        self.board = board if board is not None else Board('chess', height, width)
+        self.turn = 'white'
+        self.move_count = 0
+        self.ponderer = Ponderer(self) if ponder else None
+        self.journal = None
 
-    def get_possible_moves(self, board):
-        """Возвращает список возможных ходов для ферзя.
+    def play(self):
+        """Основной цикл игры."""
+        while True:
+            self.board.print_board()
+            print(f"Ход {'белых' if self.turn == 'white' else 'черных'}. Введите ход (например, e2 e4) или команду (back, next, hint, threats, best, explore, save, load, exit):")
+            if self.ponderer:
+                self.ponderer.start()
+            try:
+                command = input().strip().lower()
+            finally:
+                if self.ponderer:
+                    self.ponderer.stop()
+            keep_going = self.handle_command(command)
+            if self.journal is not None and self.journal.needs_checkpoint():
+                self.journal.checkpoint(self)
+            if not keep_going:
+                break
+
+    def handle_command(self, command):
+        """Выполняет одну команду игрока.
 
         Args:
-            board (Board): Шахматная доска.
+            command (str): Ход (например, 'e2 e4') или команда.
 
         Returns:
-            list: Список возможных ходов.
+            bool: False, если игру нужно завершить, иначе True.
         """
-        moves = []
-        start_row, start_col = board.parse_position(self.position)
-        for row in range(8):
-            if row != start_row and self.is_valid_move(board, f"{chr(start_col + ord('a'))}{8 - row}"):
-                moves.append(f"{chr(start_col + ord('a'))}{8 - row}")
-        for col in range(8):
-            if col != start_col and self.is_valid_move(board, f"{chr(col + ord('a'))}{8 - start_row}"):
-                moves.append(f"{chr(col + ord('a'))}{8 - start_row}")
-        for row_step, col_step in [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
-            row, col = start_row + row_step, start_col + col_step
-            while 0 <= row < 8 and 0 <= col < 8:
-                if self.is_valid_move(board, f"{chr(col + ord('a'))}{8 - row}"):
-                    moves.append(f"{chr(col + ord('a'))}{8 - row}")
-                row += row_step
-                col += col_step
-        return moves
-
+        if command == 'exit':
+            return False
+        elif command == 'back':
+            if not self.board.move_history:
+                print("Нет ходов для отмены.")
+                return True
+            self.board.undo_move()
+            self.move_count -= 1
+            self.turn = 'black' if self.turn == 'white' else 'white'
+        elif command == 'next':
+            if not self.board.redo_history:
+                print("Нет отмененных ходов.")
+                return True
+            self.board.redo_move()
+            self.move_count += 1
+            self.turn = 'black' if self.turn == 'white' else 'white'
+            return not self.announce_draw()
+        elif command.startswith('hint'):
+            pos = command.split()[1]
+            self.hint(pos)
+        elif command.startswith('threats'):
+            pos = command.split()[1]
+            self.threats(pos)
+        elif command == 'best':
+            self.best_move()
+        elif command.startswith('explore'):
+            words = command.split()
+            if len(words) > 2 or (len(words) == 2 and not (words[1].isdecimal() and int(words[1]) > 0)):
+                print("Неверный формат команды. Повторите попытку.")
+                return True
+            self.explore(int(words[1]) if len(words) > 1 else EXPLORE_MAX_NODES)
+        elif command.startswith('save'):
+            filename = command.split()[1]
+            self.save_game(filename)
+        elif command.startswith('load'):
+            filename = command.split()[1]
+            self.load_game(filename)
+        else:
+            try:
+                start, end = command.split()
+                expected = self.cached_moves(start)
+                if (expected is not None and end in expected) or self.is_valid_move(start, end):
+                    self.board.make_move(start, end)
+                    self.move_count += 1
+                    self.turn = 'black' if self.turn == 'white' else 'white'
+                    return not self.announce_draw()
+                else:
+                    print("Неверный ход. Повторите попытку.")
+            except ValueError:
+                print("Неверный формат команды. Повторите попытку.")
+        return True
 
-class King(Piece):
-    """Класс, представляющий короля."""
+    def attach_journal(self, journal):
+        """Начинает записывать ходы партии в журнал.
 
-    def is_valid_move(self, board, end):
-        """Проверяет, является ли ход короля допустимым.
+        В журнал сразу пишется контрольная точка с текущим состоянием партии.
 
         Args:
-            board (Board): Шахматная доска.
-            end (str): Конечная позиция.
-
-        Returns:
-            bool: True, если ход допустим, иначе False.
+            journal (Journal): Открытый журнал.
         """
-        start_row, start_col = board.parse_position(self.position)
-        end_row, end_col = board.parse_position(end)
-        if abs(start_row - end_row) <= 1 and abs(start_col - end_col) <= 1:
-            return board.board[end_row][end_col] == '.' or board.board[end_row][end_col].islower() != self.color == 'white'
-        return False
+        self.journal = journal
+        self.board.journal = journal
+        journal.checkpoint(self)
 
-    def get_possible_moves(self, board):
-        """Возвращает список возможных ходов для короля.
+    def explore(self, max_nodes=EXPLORE_MAX_NODES):
+        """Просмотр дерева вариантов от текущей позиции; сама партия не меняется.
 
         Args:
-            board (Board): Шахматная доска.
+            max_nodes (int): Максимальное число узлов дерева в памяти.
+        """
+        tree = GameTree(self, max_nodes)
+        print("Просмотр вариантов. Команды: ls, more, <ход> (например, e2 e4), up, root, board, path, best, stats, quit.")
+        while True:
+            print(f"[{tree.path_text() or 'начало'}] ход {'белых' if tree.game.turn == 'white' else 'черных'}:")
+            if not tree.handle(input().strip().lower()):
+                break
+
+    def announce_draw(self):
+        """Сообщает о ничьей, если она наступила.
 
         Returns:
-            list: Список возможных ходов.
+            bool: True, если партия закончилась вничью.
         """
-        moves = []
-        start_row, start_col = board.parse_position(self.position)
-        for row_offset in [-1, 0, 1]:
-            for col_offset in [-1, 0, 1]:
-                if row_offset != 0 or col_offset != 0:
-                    new_row, new_col = start_row + row_offset, start_col + col_offset
-                    if 0 <= new_row < 8 and 0 <= new_col < 8 and self.is_valid_move(board, f"{chr(new_col + ord('a'))}{8 - new_row}"):
-                        moves.append(f"{chr(new_col + ord('a'))}{8 - new_row}")
-        return moves
+        reason = self.board.draw_reason()
+        if reason is None:
+            return False
+        self.board.print_board()
+        print(f"Ничья: {reason}.")
+        return True
 
+    def is_valid_move(self, start, end):
+        """Проверяет, является ли ход допустимым.
 
-class Wizard(Piece):
-    """Класс, представляющий волшебника."""
+        Args:
+            start (str): Начальная позиция.
+            end (str): Конечная позиция.
 
-    def is_valid_move(self, board, end):
-        """Проверяет, является ли ход волшебника допустимым."""
-        start_row, start_col = board.parse_position(self.position)
-        end_row, end_col = board.parse_position(end)
+        Returns:
+            bool: True, если ход допустим, иначе False.
+        """
+        piece = self.create_piece(start)
+        if piece is None:
+            return False
+        return piece.is_valid_move(self.board, end)
 
-        # Ход как конь
-        if (abs(start_row - end_row) == 2 and abs(start_col - end_col) == 1) or (abs(start_row - end_row) == 1 and abs(start_col - end_col) == 2):
-            return board.board[end_row][end_col] == '.' or board.board[end_row][end_col].islower() != self.color == 'white'
-        
-        # Ход как король (на одну клетку в любом направлении)
-        if abs(start_row - end_row) <= 1 and abs(start_col - end_col) <= 1:
-            return board.board[end_row][end_col] == '.' or board.board[end_row][end_col].islower() != self.color == 'white'
-        
-        return False
+    def create_piece(self, pos):
+        """Создает объект фигуры, стоящей на указанной клетке.
 
-    def get_possible_moves(self, board):
-        """Возвращает список возможных ходов для волшебника."""
-        moves = []
-        start_row, start_col = board.parse_position(self.position)
-        
-        # Ходы как конь
-        for row_offset in [-2, -1, 1, 2]:
-            for col_offset in [-2, -1, 1, 2]:
-                if abs(row_offset) != abs(col_offset):
-                    new_row, new_col = start_row + row_offset, start_col + col_offset
-                    if 0 <= new_row < 8 and 0 <= new_col < 8 and self.is_valid_move(board, f"{chr(new_col + ord('a'))}{8 - new_row}"):
-                        moves.append(f"{chr(new_col + ord('a'))}{8 - new_row}")
-        
-        # Ходы как король
-        for row_offset in [-1, 0, 1]:
-            for col_offset in [-1, 0, 1]:
-                if row_offset != 0 or col_offset != 0:
-                    new_row, new_col = start_row + row_offset, start_col + col_offset
-                    if 0 <= new_row < 8 and 0 <= new_col < 8 and self.is_valid_move(board, f"{chr(new_col + ord('a'))}{8 - new_row}"):
-                        moves.append(f"{chr(new_col + ord('a'))}{8 - new_row}")
-        
-        return moves
+        Args:
+            pos (str): Позиция фигуры (например, 'e2').
 
+        Returns:
+            Piece: Фигура или None, если клетка пуста.
+        """
+        row, col = self.board.parse_position(pos)
+        piece = self.board.board[row][col]
+        piece_class = PIECE_CLASSES.get(piece.lower())
+        if piece == '.' or piece_class is None:
+            return None
+        return piece_class('white' if piece.isupper() else 'black', pos)
 
-class Dragon(Piece):
-    """Класс, представляющий дракона."""
+    def own_pieces(self):
+        """Перебирает фигуры стороны, которая сейчас ходит.
 
-    def is_valid_move(self, board, end):
-        """Проверяет, является ли ход дракона допустимым."""
-        start_row, start_col = board.parse_position(self.position)
-        end_row, end_col = board.parse_position(end)
+        Yields:
+            tuple: Пары (позиция, фигура).
+        """
+        for i in range(self.board.height):
+            for j in range(self.board.width):
+                piece = self.board.board[i][j]
+                if piece == '.' or piece.isupper() != (self.turn == 'white'):
+                    continue
+                pos = self.board.square_name(i, j)
+                figure = self.create_piece(pos)
+                if figure is not None:
+                    yield pos, figure
 
-        # Ход как ладья
-        if start_row == end_row or start_col == end_col:
-            return Rook.is_valid_move(self, board, end)
-        
-        # Ход как конь (перепрыгивает через одну фигуру)
-        if (abs(start_row - end_row) == 2 and abs(start_col - end_col) == 1) or (abs(start_row - end_row) == 1 and abs(start_col - end_col) == 2):
-            return board.board[end_row][end_col] == '.' or board.board[end_row][end_col].islower() != self.color == 'white'
-        
-        return False
+    def legal_moves(self):
+        """Возвращает все ходы стороны, которая сейчас ходит.
 
-    def get_possible_moves(self, board):
-        """Возвращает список возможных ходов для дракона."""
-        moves = []
-        start_row, start_col = board.parse_position(self.position)
-        
-        # Ходы как ладья
-        for row in range(8):
-            if row != start_row and self.is_valid_move(board, f"{chr(start_col + ord('a'))}{8 - row}"):
-                moves.append(f"{chr(start_col + ord('a'))}{8 - row}")
-        for col in range(8):
-            if col != start_col and self.is_valid_move(board, f"{chr(col + ord('a'))}{8 - start_row}"):
-                moves.append(f"{chr(col + ord('a'))}{8 - start_row}")
-        
-        # Ходы как конь
-        for row_offset in [-2, -1, 1, 2]:
-            for col_offset in [-2, -1, 1, 2]:
-                if abs(row_offset) != abs(col_offset):
-                    new_row, new_col = start_row + row_offset, start_col + col_offset
-                    if 0 <= new_row < 8 and 0 <= new_col < 8 and self.is_valid_move(board, f"{chr(new_col + ord('a'))}{8 - new_row}"):
-                        moves.append(f"{chr(new_col + ord('a'))}{8 - new_row}")
-        
-        return moves
+        Ходы на клетки со своими фигурами отбрасываются.
 
+        Returns:
+            list: Список пар (начальная позиция, конечная позиция).
+        """
+        return list(self.iter_legal_moves())
 
-class Archer(Piece):
-    """Класс, представляющий стрелка."""
+    def iter_legal_moves(self):
+        """Перебирает ходы стороны, которая ходит, по одной фигуре за раз.
 
-    def is_valid_move(self, board, end):
-        """Проверяет, является ли ход стрелка допустимым."""
-        start_row, start_col = board.parse_position(self.position)
-        end_row, end_col = board.parse_position(end)
+        Yields:
+            tuple: Пары (начальная позиция, конечная позиция).
+        """
+        board = self.board.board
+        white = self.turn == 'white'
+        for start, figure in self.own_pieces():
+            for end in figure.get_possible_moves(self.board):
+                end_row, end_col = self.board.parse_position(end)
+                target = board[end_row][end_col]
+                if target == '.' or target.isupper() != white:
+                    yield start, end
 
-        # Ход как слон
-        if abs(start_row - end_row) == abs(start_col - end_col):
-            return Bishop.is_valid_move(self, board, end)
-        
-        # "Стрельба" на две клетки по диагонали
-        if abs(start_row - end_row) == 2 and abs(start_col - end_col) == 2:
-            return board.board[end_row][end_col] != '.' and board.board[end_row][end_col].islower() != self.color == 'white'
-        
-        return False
+    def attack_map(self):
+        """Строит карту угроз для всех занятых клеток.
 
-    def get_possible_moves(self, board):
-        """Возвращает список возможных ходов для стрелка."""
-        moves = []
-        start_row, start_col = board.parse_position(self.position)
-        
-        # Ходы как слон
-        for row_step, col_step in [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
-            row, col = start_row + row_step, start_col + col_step
-            while 0 <= row < 8 and 0 <= col < 8:
-                if self.is_valid_move(board, f"{chr(col + ord('a'))}{8 - row}"):
-                    moves.append(f"{chr(col + ord('a'))}{8 - row}")
-                row += row_step
-                col += col_step
-        
-        # "Стрельба" на две клетки по диагонали
-        for row_step, col_step in [(-2, -2), (-2, 2), (2, -2), (2, 2)]:
-            row, col = start_row + row_step, start_col + col_step
-            if 0 <= row < 8 and 0 <= col < 8 and self.is_valid_move(board, f"{chr(col + ord('a'))}{8 - row}"):
-                moves.append(f"{chr(col + ord('a'))}{8 - row}")
-        
-        return moves
+        Returns:
+            dict: Позиция фигуры -> список позиций фигур противника, которые
+            могут ее взять.
+        """
+        threats = {}
+        cells = self.board.board
+        for i in range(self.board.height):
+            for j in range(self.board.width):
+                if cells[i][j] == '.':
+                    continue
+                square = self.board.square_name(i, j)
+                figure = self.create_piece(square)
+                if figure is None:
+                    continue
+                for move in figure.get_possible_moves(self.board):
+                    for target in self.captured_squares(square, move):
+                        row, col = self.board.parse_position(target)
+                        if cells[row][col] != '.' and cells[row][col].isupper() != cells[i][j].isupper():
+                            threats.setdefault(target, []).append(square)
+        return threats
+
+    def captured_squares(self, start, end):
+        """Возвращает клетки, фигуры на которых будут взяты ходом start-end."""
+        return [end]
+
+    def possible_moves(self, pos):
+        """Возвращает возможные ходы фигуры, используя результаты фонового анализа.
 
+        Args:
+            pos (str): Позиция фигуры (например, 'e2').
 
-class Game:
-    """Класс, управляющий шахматной игрой."""
+        Returns:
+            list: Список возможных ходов.
+        """
+        cached = self.cached_moves(pos)
+        if cached is not None:
+            return list(cached)
+        piece = self.create_piece(pos)
+        return piece.get_possible_moves(self.board) if piece else []
+
+    def cached_moves(self, pos):
+        """Возвращает ходы фигуры, найденные фоновым анализом, или None."""
+        if self.ponderer is None:
+            return None
+        entry = self.ponderer.cache.get(self.position_key())
+        if entry is None or 'moves' not in entry:
+            return None
+        return entry['moves'].get(pos)
+
+    def position(self):
+        """Возвращает строку текущей позиции (см. Board.to_position)."""
+        return self.board.to_position(self.turn)
+
+    def set_position(self, position):
+        """Устанавливает позицию из строки; история ходов очищается.
 
-    def __init__(self):
-        """Инициализация игры."""
-        self.board = Board()
-        self.turn = 'white'
-        self.move_count = 0
+        Args:
+            position (str): Строка позиции того же типа игры.
+        """
+        board, turn = Board.from_position(position)
+        if board.game_type != self.board.game_type:
+            raise ValueError(f"Позиция для игры {board.game_type}, а партия — {self.board.game_type}.")
+        self.board = board
+        self.turn = turn
+        if self.journal is not None:
+            self.attach_journal(self.journal)
+
+    def position_key(self):
+        """Возвращает ключ текущей позиции для кэша анализа."""
+        return self.position()
+
+    @staticmethod
+    def from_position(position, ponder=False):
+        """Создает партию (Game или CheckersGame) по строке позиции.
 
-    def play(self):
-        """Основной цикл игры."""
-        while True:
-            self.board.print_board()
-            print(f"Ход {'белых' if self.turn == 'white' else 'черных'}. Введите ход (например, e2 e4) или команду (back, next, hint, threats, save, load, exit):")
-            command = input().strip().lower()
+        Args:
+            position (str): Строка позиции (см. Board.to_position).
+            ponder (bool): Анализировать позицию в фоне.
 
-            if command == 'exit':
-                break
-            elif command == 'back':
-                self.board.undo_move()
-                self.move_count -= 1
-                self.turn = 'black' if self.turn == 'white' else 'white'
-            elif command == 'next':
-                self.board.redo_move()
-                self.move_count += 1
-                self.turn = 'black' if self.turn == 'white' else 'white'
-            elif command.startswith('hint'):
-                pos = command.split()[1]
-                self.hint(pos)
-            elif command.startswith('threats'):
-                pos = command.split()[1]
-                self.threats(pos)
-            elif command.startswith('save'):
-                filename = command.split()[1]
-                self.save_game(filename)
-            elif command.startswith('load'):
-                filename = command.split()[1]
-                self.load_game(filename)
-            else:
-                try:
-                    start, end = command.split()
-                    if self.is_valid_move(start, end):
-                        self.board.make_move(start, end)
-                        self.move_count += 1
-                        self.turn = 'black' if self.turn == 'white' else 'white'
-                    else:
-                        print("Неверный ход. Повторите попытку.")
-                except ValueError:
-                    print("Неверный формат команды. Повторите попытку.")
+        Returns:
+            Game: Партия в указанной позиции.
+        """
+        board, turn = Board.from_position(position)
+        return Game.from_board(board, turn, ponder)
 
-    def is_valid_move(self, start, end):
-        """Проверяет, является ли ход допустимым.
+    @staticmethod
+    def from_board(board, turn='white', ponder=False):
+        """Создает партию (Game или CheckersGame) с готовой доской.
 
         Args:
-            start (str): Начальная позиция.
-            end (str): Конечная позиция.
+            board (Board): Доска.
+            turn (str): Чей ход.
+            ponder (bool): Анализировать позицию в фоне.
 
         Returns:
-            bool: True, если ход допустим, иначе False.
+            Game: Партия в позиции доски.
         """
-        start_row, start_col = self.board.parse_position(start)
-        end_row, end_col = self.board.parse_position(end)
-        piece = self.board.board[start_row][start_col]
+        game = (CheckersGame if board.game_type == 'checkers' else Game)(ponder, board=board)
+        game.turn = turn
+        return game
+
+    def copy(self):
+        """Возвращает независимую копию партии без истории ходов."""
+        game = type(self)(board=self.board.copy())
+        game.turn = self.turn
+        game.move_count = self.move_count
+        return game
+
+    def evaluate(self):
+        """Оценивает позицию по материалу с точки зрения стороны, которая ходит."""
+        values = PIECE_VALUES[self.board.game_type]
+        score = 0
+        for row in self.board.board:
+            for piece in row:
+                if piece != '.':
+                    value = values.get(piece.lower(), 0)
+                    score += value if piece.isupper() else -value
+        return score if self.turn == 'white' else -score
+
+    def search(self, depth, should_stop=None):
+        """Ищет лучший ход перебором с альфа-бета отсечением.
 
-        if piece == '.':
-            return False
+        Args:
+            depth (int): Глубина перебора в полуходах.
+            should_stop (callable): Функция без аргументов; если она вернет True,
+                перебор прерывается исключением SearchStopped.
 
-        if piece.lower() == 'p':
-            return Pawn('white' if piece.isupper() else 'black', start).is_valid_move(self.board, end)
-        elif piece.lower() == 'h':
-            return Knight('white' if piece.isupper() else 'black', start).is_valid_move(self.board, end)
-        elif piece.lower() == 'r':
-            return Rook('white' if piece.isupper() else 'black', start).is_valid_move(self.board, end)
-        elif piece.lower() == 'b':
-            return Bishop('white' if piece.isupper() else 'black', start).is_valid_move(self.board, end)
-        elif piece.lower() == 'q':
-            return Queen('white' if piece.isupper() else 'black', start).is_valid_move(self.board, end)
-        elif piece.lower() == 'k':
-            return King('white' if piece.isupper() else 'black', start).is_valid_move(self.board, end)
-        elif piece.lower() == 'w':  # Волшебник
-            return Wizard('white' if piece.isupper() else 'black', start).is_valid_move(self.board, end)
-        elif piece.lower() == 'd':  # Дракон
-            return Dragon('white' if piece.isupper() else 'black', start).is_valid_move(self.board, end)
-        elif piece.lower() == 'a':  # Стрелок
-            return Archer('white' if piece.isupper() else 'black', start).is_valid_move(self.board, end)
+        Returns:
+            tuple: (оценка для стороны, которая ходит, лучший ход или None).
+        """
+        return self.copy()._negamax(depth, -float('inf'), float('inf'), should_stop)
+
+    def _negamax(self, depth, alpha, beta, should_stop):
+        if should_stop is not None and should_stop():
+            raise SearchStopped()
+        if self.board.is_draw():
+            return 0, None
+        if depth == 0:
+            return self.evaluate(), None
+        moves = self.legal_moves()
+        if not moves:
+            return self.evaluate(), None
+        best_score, best_move = -float('inf'), None
+        for start, end in moves:
+            self.board.make_move(start, end)
+            self.turn = 'black' if self.turn == 'white' else 'white'
+            score = -self._negamax(depth - 1, -beta, -alpha, should_stop)[0]
+            self.board.undo_move()
+            self.turn = 'black' if self.turn == 'white' else 'white'
+            if score > best_score:
+                best_score, best_move = score, (start, end)
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+        return best_score, best_move
 
-        return False
+    def best_move(self):
+        """Показывает лучший ход: из фонового анализа или после перебора."""
+        entry = self.ponderer.cache.get(self.position_key()) if self.ponderer else None
+        if entry is not None and 'best' in entry:
+            score, move, depth = entry['best']
+        else:
+            depth = SEARCH_DEPTH
+            score, move = self.search(depth)
+        if move is None:
+            print("Нет возможных ходов.")
+        else:
+            print(f"Лучший ход: {move[0]} {move[1]} (оценка {score}, глубина {depth})")
 
     def hint(self, pos):
         """Показывает возможные ходы для фигуры на указанной клетке.
@@ -767,25 +1245,7 @@ class Game:
             print("Нельзя получить подсказку для фигуры противника.")
             return
 
-        moves = []
-        if piece.lower() == 'p':
-            moves = Pawn('white' if piece.isupper() else 'black', pos).get_possible_moves(self.board)
-        elif piece.lower() == 'h':
-            moves = Knight('white' if piece.isupper() else 'black', pos).get_possible_moves(self.board)
-        elif piece.lower() == 'r':
-            moves = Rook('white' if piece.isupper() else 'black', pos).get_possible_moves(self.board)
-        elif piece.lower() == 'b':
-            moves = Bishop('white' if piece.isupper() else 'black', pos).get_possible_moves(self.board)
-        elif piece.lower() == 'q':
-            moves = Queen('white' if piece.isupper() else 'black', pos).get_possible_moves(self.board)
-        elif piece.lower() == 'k':
-            moves = King('white' if piece.isupper() else 'black', pos).get_possible_moves(self.board)
-        elif piece.lower() == 'w':  # Волшебник
-            moves = Wizard('white' if piece.isupper() else 'black', pos).get_possible_moves(self.board)
-        elif piece.lower() == 'd':  # Дракон
-            moves = Dragon('white' if piece.isupper() else 'black', pos).get_possible_moves(self.board)
-        elif piece.lower() == 'a':  # Стрелок
-            moves = Archer('white' if piece.isupper() else 'black', pos).get_possible_moves(self.board)
+        moves = self.possible_moves(pos)
 
         if moves:
             print(f"Возможные ходы для фигуры на {pos}: {', '.join(moves)}")
@@ -803,32 +1263,15 @@ class Game:
         row, col = self.board.parse_position(pos)
         threats = []
 
-        for i in range(8):
-            for j in range(8):
+        for i in range(self.board.height):
+            for j in range(self.board.width):
                 piece = self.board.board[i][j]
                 if piece != '.' and piece.islower() != self.board.board[row][col].islower():
-                    # Определяем тип фигуры и вызываем get_possible_moves для неё
-                    if piece.lower() == 'p':
-                        moves = Pawn('white' if piece.isupper() else 'black', f"{chr(j + ord('a'))}{8 - i}").get_possible_moves(self.board)
-                    elif piece.lower() == 'h':
-                        moves = Knight('white' if piece.isupper() else 'black', f"{chr(j + ord('a'))}{8 - i}").get_possible_moves(self.board)
-                    elif piece.lower() == 'r':
-                        moves = Rook('white' if piece.isupper() else 'black', f"{chr(j + ord('a'))}{8 - i}").get_possible_moves(self.board)
-                    elif piece.lower() == 'b':
-                        moves = Bishop('white' if piece.isupper() else 'black', f"{chr(j + ord('a'))}{8 - i}").get_possible_moves(self.board)
-                    elif piece.lower() == 'q':
-                        moves = Queen('white' if piece.isupper() else 'black', f"{chr(j + ord('a'))}{8 - i}").get_possible_moves(self.board)
-                    elif piece.lower() == 'k':
-                        moves = King('white' if piece.isupper() else 'black', f"{chr(j + ord('a'))}{8 - i}").get_possible_moves(self.board)
-                    elif piece.lower() == 'w':  # Волшебник
-                        moves = Wizard('white' if piece.isupper() else 'black', f"{chr(j + ord('a'))}{8 - i}").get_possible_moves(self.board)
-                    elif piece.lower() == 'd':  # Дракон
-                        moves = Dragon('white' if piece.isupper() else 'black', f"{chr(j + ord('a'))}{8 - i}").get_possible_moves(self.board)
-                    elif piece.lower() == 'a':  # Стрелок
-                        moves = Archer('white' if piece.isupper() else 'black', f"{chr(j + ord('a'))}{8 - i}").get_possible_moves(self.board)
-                    
+                    figure = self.create_piece(self.board.square_name(i, j))
+                    if figure is None:
+                        continue
                     # Проверяем, может ли фигура атаковать указанную позицию
-                    for move in moves:
+                    for move in figure.get_possible_moves(self.board):
                         if self.board.parse_position(move) == (row, col):
                             threats.append((i, j))
 
@@ -837,7 +1280,7 @@ class Game:
         if threats:
             print(f"Фигура на позиции {pos} под угрозой от следующих фигур:")
             for threat in threats:
-                print(f"{self.board.board[threat[0]][threat[1]]} на {chr(threat[1] + ord('a'))}{8 - threat[0]}")
+                print(f"{self.board.board[threat[0]][threat[1]]} на {self.board.square_name(*threat)}")
         else:
             print(f"Фигура на позиции {pos} не под угрозой.")
 
@@ -852,8 +1295,8 @@ class Game:
                 start, end, piece, captured_piece = move
                 start_row, start_col = self.board.parse_position(start)
                 end_row, end_col = self.board.parse_position(end)
-                start_pos = f"{chr(start_col + ord('a'))}{8 - start_row}"
-                end_pos = f"{chr(end_col + ord('a'))}{8 - end_row}"
+                start_pos = self.board.square_name(start_row, start_col)
+                end_pos = self.board.square_name(end_row, end_col)
                 full_notation = f"{piece}{start_pos}{end_pos}"
                 file.write(f"{full_notation}\n")
         print(f"Партия сохранена в файл {filename}")
@@ -864,25 +1307,30 @@ class Game:
         Args:
             filename (str): Имя файла для загрузки.
         """
-        self.board = Board()
+        self.board = Board(self.board.game_type, self.board.height, self.board.width)
         self.turn = 'white'
         self.move_count = 0
 
         with open(filename, 'r') as file:
             for line in file:
-                move = line.strip()
-                piece = move[0]
-                start_pos = move[1:3]
-                end_pos = move[3:5]
+                if not line.strip():
+                    continue
+                piece, start_pos, end_pos = parse_saved_move(line)
                 self.board.make_move(start_pos, end_pos)
+                self.move_count += 1
+                self.turn = 'black' if self.turn == 'white' else 'white'
+        if self.journal is not None:
+            self.attach_journal(self.journal)
         print(f"Партия загружена из файла {filename}")
 class CheckersGame(Game):
     """Класс, управляющий игрой в шашки."""
 
-    def __init__(self):
-        self.board = Board(game_type='checkers')
+    def __init__(self, ponder=False, height=8, width=8, board=None):
+        self.board = board if board is not None else Board('checkers', height, width)
         self.turn = 'white'
         self.move_count = 0
+        self.ponderer = Ponderer(self) if ponder else None
+        self.journal = None
 
     def is_valid_move(self, start, end):
         """Проверяет, является ли ход допустимым в шашках."""
@@ -894,6 +1342,30 @@ class CheckersGame(Game):
         checker = Checker('white' if piece.isupper() else 'black', start) if piece in 'Wb' else KingChecker('white' if piece.isupper() else 'black', start)
         return checker.is_valid_move(self.board, end)
 
+    def captured_squares(self, start, end):
+        """Возвращает клетки, через которые перепрыгивает шашка при ходе start-end."""
+        start_row, start_col = self.board.parse_position(start)
+        end_row, end_col = self.board.parse_position(end)
+        row_step = 1 if end_row > start_row else -1
+        col_step = 1 if end_col > start_col else -1
+        squares = []
+        row, col = start_row + row_step, start_col + col_step
+        while row != end_row:
+            if self.board.board[row][col] != '.':
+                squares.append(self.board.square_name(row, col))
+            row += row_step
+            col += col_step
+        return squares
+
+    def create_piece(self, pos):
+        """Создает объект шашки, стоящей на указанной клетке."""
+        row, col = self.board.parse_position(pos)
+        piece = self.board.board[row][col]
+        if piece == '.':
+            return None
+        color = 'white' if piece.isupper() else 'black'
+        return Checker(color, pos) if piece in 'Wb' else KingChecker(color, pos)
+
     def make_move(self, start, end):
         print(f"\n=== Попытка хода {start} -> {end} ===")
         start_row, start_col = self.board.parse_position(start)
@@ -904,7 +1376,7 @@ class CheckersGame(Game):
         if abs(start_row - end_row) == 2:
             mid_row = (start_row + end_row) // 2
             mid_col = (start_col + end_col) // 2
-            print(f"Удаление шашки на позиции {chr(mid_col + ord('a'))}{8 - mid_row}")
+            print(f"Удаление шашки на позиции {self.board.square_name(mid_row, mid_col)}")
             self.board.board[mid_row][mid_col] = '.'
 
         # Обработка взятия
@@ -922,7 +1394,7 @@ class CheckersGame(Game):
         self.board.board[end_row][end_col] = piece
 
         # Превращение в дамку
-        if (piece == 'W' and end_row == 0) or (piece == 'b' and end_row == 7):
+        if (piece == 'W' and end_row == 0) or (piece == 'b' and end_row == self.board.height - 1):
             self.board.board[end_row][end_col] = piece.upper() if self.turn == 'white' else piece.lower()
 
         self.turn = 'black' if self.turn == 'white' else 'white'
@@ -939,8 +1411,7 @@ class CheckersGame(Game):
             print("Нельзя получить подсказку для шашки противника.")
             return
 
-        checker = Checker('white' if piece.isupper() else 'black', pos) if piece in 'Wb' else KingChecker('white' if piece.isupper() else 'black', pos)
-        moves = checker.get_possible_moves(self.board)
+        moves = self.possible_moves(pos)
 
         if moves:
             print(f"Возможные ходы для шашки на {pos}: {', '.join(moves)}")
@@ -953,11 +1424,12 @@ class CheckersGame(Game):
         """Показывает, какие шашки угрожают указанной клетке."""
         row, col = self.board.parse_position(pos)
         threats = []
-        for i in range(8):
-            for j in range(8):
+        for i in range(self.board.height):
+            for j in range(self.board.width):
                 piece = self.board.board[i][j]
                 if piece != '.' and piece.islower() != self.board.board[row][col].islower():
-                    checker = Checker('white' if piece.isupper() else 'black', f"{chr(j + ord('a'))}{8 - i}") if piece in 'Wb' else KingChecker('white' if piece.isupper() else 'black', f"{chr(j + ord('a'))}{8 - i}")
+                    square = self.board.square_name(i, j)
+                    checker = Checker('white' if piece.isupper() else 'black', square) if piece in 'Wb' else KingChecker('white' if piece.isupper() else 'black', square)
                     moves = checker.get_possible_moves(self.board)
                     if pos in moves:
                         threats.append((i, j))
@@ -966,18 +1438,516 @@ class CheckersGame(Game):
         if threats:
             print(f"Клетка {pos} под угрозой от следующих шашек:")
             for threat in threats:
-                print(f"{self.board.board[threat[0]][threat[1]]} на {chr(threat[1] + ord('a'))}{8 - threat[0]}")
+                print(f"{self.board.board[threat[0]][threat[1]]} на {self.board.square_name(*threat)}")
         else:
             print(f"Клетка {pos} не под угрозой.")
 
+class Ponderer:
+    """Фоновый анализ позиции, пока игрок вводит команду.
+
+    Анализ идет в отдельном потоке на копии партии. Результаты (возможные
+    ходы фигур и лучший ход с глубиной перебора) складываются в общий кэш
+    по ключу позиции, откуда их берут команды hint, best и проверка хода.
+    """
+
+    def __init__(self, game, max_depth=4, max_entries=256):
+        """Инициализация фонового анализа.
+
+        Args:
+            game (Game): Партия, позицию которой нужно анализировать.
+            max_depth (int): Максимальная глубина перебора.
+            max_entries (int): Максимальное число позиций в кэше.
+        """
+        self.game = game
+        self.max_depth = max_depth
+        self.max_entries = max_entries
+        self.cache = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Запускает анализ текущей позиции партии."""
+        self.stop()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(self.game.copy(), self.game.position_key()),
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Останавливает анализ и дожидается завершения потока."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, game, key):
+        entry = self.cache.get(key)
+        if entry is None:
+            while len(self.cache) >= self.max_entries:
+                del self.cache[next(iter(self.cache))]
+            entry = self.cache[key] = {}
+        try:
+            if 'moves' not in entry:
+                moves = {}
+                for pos, piece in game.own_pieces():
+                    if self._stop.is_set():
+                        return
+                    moves[pos] = piece.get_possible_moves(game.board)
+                entry['moves'] = moves
+            depth = entry['best'][2] + 1 if 'best' in entry else 1
+            while depth <= self.max_depth:
+                score, move = game.search(depth, self._stop.is_set)
+                entry['best'] = (score, move, depth)
+                depth += 1
+        except SearchStopped:
+            pass
+
+
+JOURNAL_SYNC_INTERVAL = 0.2  # Секунд, в течение которых запись может ждать fsync
+
+
+class Journal:
+    """Журнал партии, в который дописываются ходы, отмены и повторы.
+
+    Каждая запись — короткая строка: 'm e2 e4' (ход), 'u' (отмена), 'r'
+    (повтор). Записи сразу передаются операционной системе, а fsync
+    выполняется пачками: после batch_size записей или не позже чем через
+    JOURNAL_SYNC_INTERVAL секунд фоновым потоком. Каждые checkpoint_every
+    записей журнал заменяется одной контрольной точкой 'c ...' с полным
+    состоянием партии, поэтому файл не длиннее одного состояния и
+    checkpoint_every записей, а при восстановлении переигрываются только
+    записи после точки.
+    """
+
+    _open = set()  # Открытые журналы, которые досинхронизирует фоновый поток
+    _open_lock = threading.Lock()
+    _flusher = None
+
+    def __init__(self, filename, batch_size=64, checkpoint_every=1000, inline_sync=True):
+        """Открывает журнал для дописывания.
+
+        Args:
+            filename (str): Имя файла журнала.
+            batch_size (int): Число записей, после которого выполняется fsync.
+            checkpoint_every (int): Число записей между контрольными точками.
+            inline_sync (bool): Выполнять fsync и замену журнала контрольной
+                точкой прямо в append и checkpoint. Если False, они
+                откладываются до вызова sync (см. sync_due) — так сервер
+                выносит работу с диском из цикла событий.
+        """
+        self.filename = filename
+        self.batch_size = batch_size
+        self.checkpoint_every = checkpoint_every
+        self.inline_sync = inline_sync
+        self.file = open(filename, 'a', encoding='utf-8')
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()  # Замена журнала контрольной точкой
+        self.pending = None  # Контрольная точка и записи после нее, еще не записанные в файл
+        self.unsynced = 0
+        self.first_unsynced = 0.0
+        self.since_checkpoint = 0
+        with Journal._open_lock:
+            Journal._open.add(self)
+            if Journal._flusher is None:
+                Journal._flusher = threading.Thread(target=Journal._flush_periodically, daemon=True)
+                Journal._flusher.start()
+                atexit.register(Journal._close_all)
+
+    def append(self, record):
+        """Дописывает запись в журнал."""
+        with self.lock:
+            self.since_checkpoint += 1
+            if self.pending is not None:
+                self.pending.append(record)
+                return
+            self.file.write(record + '\n')
+            self.file.flush()
+            if not self.unsynced:
+                self.first_unsynced = time.monotonic()
+            self.unsynced += 1
+            if self.inline_sync and self.unsynced >= self.batch_size:
+                self._sync()
+
+    def needs_checkpoint(self):
+        """Возвращает True, если после контрольной точки накопилось много записей."""
+        return self.since_checkpoint >= self.checkpoint_every
+
+    def sync_due(self):
+        """Возвращает True, если отложенную работу пора выполнить вызовом sync."""
+        return self.pending is not None or self.unsynced >= self.batch_size
+
+    def checkpoint(self, game):
+        """Заменяет журнал контрольной точкой с полным состоянием партии.
+
+        Точка пишется во временный файл, который после fsync атомарно
+        подменяет журнал, поэтому при сбое остается старый или новый журнал
+        целиком. Если inline_sync=False, здесь только запоминается строка
+        точки, а файл заменяет следующий вызов sync.
+
+        Args:
+            game (Game): Партия, ходы которой пишутся в журнал.
+        """
+        board = game.board
+        history = ';'.join(f"{start},{end},{piece},{captured},{clock}" for (start, end, piece, captured), clock
+                           in zip(board.move_history, board.clock_history)) or '-'
+        redo = ';'.join(','.join(move) for move in board.redo_history) or '-'
+        counts = ';'.join(f"{key:x}:{count}" for key, count in board.position_counts.items())
+        record = f"c {game.move_count} {game.position()} {board.halfmove_clock} {history} {redo} {counts}"
+        with self.lock:
+            self.pending = [record]
+            self.since_checkpoint = 0
+        if self.inline_sync:
+            self._write_pending()
+
+    def sync(self):
+        """Записывает отложенную контрольную точку и сбрасывает записи на диск."""
+        self._write_pending()
+        with self.lock:
+            self._sync()
+
+    def _sync(self):
+        if self.unsynced and not self.file.closed:
+            os.fsync(self.file.fileno())
+            self.unsynced = 0
+
+    def _write_pending(self):
+        with self.write_lock:
+            with self.lock:
+                if self.pending is None or self.file.closed:
+                    return
+                lines = list(self.pending)
+            # Диск не трогается под self.lock: append в это время только
+            # добавляет записи в self.pending.
+            temporary = self.filename + '.tmp'
+            with open(temporary, 'w', encoding='utf-8') as file:
+                file.write(''.join(line + '\n' for line in lines))
+                file.flush()
+                os.fsync(file.fileno())
+            with self.lock:
+                self.file.close()
+                os.replace(temporary, self.filename)
+                self.file = open(self.filename, 'a', encoding='utf-8')
+                self.unsynced = 0
+                later = self.pending[len(lines):]
+                self.pending = None
+                if later:
+                    self.file.write(''.join(line + '\n' for line in later))
+                    self.file.flush()
+                    self.first_unsynced = time.monotonic()
+                    self.unsynced = len(later)
+            self._sync_directory()
+
+    def _sync_directory(self):
+        # Переименование файла надежно, только когда на диск записан и каталог.
+        if not hasattr(os, 'O_DIRECTORY'):
+            return
+        descriptor = os.open(os.path.dirname(os.path.abspath(self.filename)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+
+    def close(self):
+        """Сбрасывает записи на диск и закрывает журнал."""
+        with Journal._open_lock:
+            Journal._open.discard(self)
+        self._write_pending()
+        with self.lock:
+            if not self.file.closed:
+                self._sync()
+                self.file.close()
+
+    @staticmethod
+    def _close_all():
+        with Journal._open_lock:
+            journals = list(Journal._open)
+        for journal in journals:
+            journal.close()
+
+    @staticmethod
+    def _flush_periodically():
+        while True:
+            time.sleep(JOURNAL_SYNC_INTERVAL / 2)
+            now = time.monotonic()
+            with Journal._open_lock:
+                journals = list(Journal._open)
+            for journal in journals:
+                if journal.unsynced and now - journal.first_unsynced >= JOURNAL_SYNC_INTERVAL:
+                    journal.sync()
+
+    @staticmethod
+    def restore(filename, ponder=False, inline_sync=True):
+        """Восстанавливает партию из журнала и продолжает запись в него.
+
+        Состояние берется из последней контрольной точки, затем переигрываются
+        записи после нее. Недописанная последняя строка (сбой во время записи)
+        отбрасывается.
+
+        Args:
+            filename (str): Имя файла журнала.
+            ponder (bool): Анализировать позицию в фоне.
+            inline_sync (bool): Режим записи в журнал дальше (см. Journal).
+
+        Returns:
+            Game: Восстановленная партия с подключенным журналом.
+        """
+        with open(filename, 'rb') as file:
+            data = file.read()
+        complete = data[:data.rfind(b'\n') + 1]
+        if len(complete) != len(data):
+            os.truncate(filename, len(complete))
+        lines = complete.decode('utf-8').splitlines()
+        last = max((index for index, line in enumerate(lines) if line.startswith('c ')), default=None)
+        if last is None:
+            raise ValueError(f"В журнале {filename} нет контрольной точки.")
+        game = Journal._load_checkpoint(lines[last], ponder)
+        for line in lines[last + 1:]:
+            words = line.split()
+            if not words:
+                continue
+            if words[0] == 'm' and len(words) == 3:
+                game.board.make_move(words[1], words[2])
+                game.move_count += 1
+            elif words == ['u'] and game.board.move_history:
+                game.board.undo_move()
+                game.move_count -= 1
+            elif words == ['r'] and game.board.redo_history:
+                game.board.redo_move()
+                game.move_count += 1
+            else:
+                raise ValueError(f"Неверная запись журнала: {line!r}")
+            game.turn = 'black' if game.turn == 'white' else 'white'
+        game.attach_journal(Journal(filename, inline_sync=inline_sync))
+        return game
+
+    @staticmethod
+    def _load_checkpoint(line, ponder=False):
+        """Создает партию по строке контрольной точки."""
+        try:
+            _, move_count, placement, side, game_type, clock, history, redo, counts = line.split()
+            game = Game.from_position(f"{placement} {side} {game_type}", ponder)
+            board = game.board
+            game.move_count = int(move_count)
+            board.halfmove_clock = int(clock)
+            for record in history.split(';') if history != '-' else []:
+                start, end, piece, captured, before = record.split(',')
+                board.move_history.append((start, end, piece, captured))
+                board.clock_history.append(int(before))
+            for record in redo.split(';') if redo != '-' else []:
+                board.redo_history.append(tuple(record.split(',')))
+            board.position_counts = {int(key, 16): int(count) for key, count
+                                     in (item.split(':') for item in counts.split(';'))}
+        except ValueError:
+            raise ValueError(f"Неверная контрольная точка журнала: {line[:60]!r}") from None
+        return game
+
+
+class TreeNode:
+    """Узел дерева вариантов.
+
+    Узел хранит только строку позиции. Ходы перечисляются генератором
+    Game.iter_legal_moves по мере надобности, а дочерние узлы создаются,
+    только когда в них переходят.
+    """
+
+    __slots__ = ('position', 'moves', 'pending', 'complete', 'children')
+
+    def __init__(self, position):
+        self.position = position
+        self.moves = []  # Уже перечисленные ходы
+        self.pending = None  # Генератор остальных ходов (None — узел еще не открывали)
+        self.complete = False  # Все ходы перечислены
+        self.children = {}  # Ход -> ключ дочернего узла
+
+    def pull(self, count=None, until=None):
+        """Перечисляет следующие ходы узла.
+
+        Args:
+            count (int): Сколько ходов добавить (None — все).
+            until (tuple): Остановиться, как только встретится этот ход.
+
+        Returns:
+            list: Добавленные ходы.
+        """
+        if self.complete:
+            return []
+        if self.pending is None:
+            # У генератора своя партия: общая партия дерева меняется при переходах.
+            self.pending = Game.from_position(self.position).iter_legal_moves()
+        added = []
+        for move in self.pending:
+            self.moves.append(move)
+            added.append(move)
+            if move == until or (count is not None and len(added) >= count):
+                return added
+        self.pending = None
+        self.complete = True
+        return added
+
+
+class GameTree:
+    """Дерево вариантов с ленивым раскрытием и ограничением памяти.
+
+    Узлы хранятся в таблице по хэшу позиции (Board.hash), поэтому позиции,
+    к которым ведут разные порядки ходов, — это один узел. Когда узлов
+    становится больше max_nodes, вытесняются давно не посещавшиеся; узлы
+    текущего пути не вытесняются. Вытесненный узел создается заново, если
+    в него снова перейти.
+    """
+
+    def __init__(self, game, max_nodes=EXPLORE_MAX_NODES):
+        """Создает дерево с корнем в текущей позиции партии.
+
+        Args:
+            game (Game): Партия; ее позиция копируется, сама партия не меняется.
+            max_nodes (int): Максимальное число узлов в памяти.
+        """
+        self.max_nodes = max(1, max_nodes)
+        self.nodes = OrderedDict()
+        self.evicted = 0
+        self.game = Game.from_position(game.position())
+        self.path = [(self._node_for(self.game), None)]  # (ключ узла, ход, который к нему привел)
+
+    def _node_for(self, game):
+        """Возвращает ключ узла позиции партии, создавая узел при необходимости."""
+        key = game.board.hash
+        if key in self.nodes:
+            self.nodes.move_to_end(key)
+        else:
+            self.nodes[key] = TreeNode(game.position())
+        return key
+
+    def _evict(self):
+        """Вытесняет давно не посещавшиеся узлы сверх max_nodes."""
+        protected = {key for key, _ in self.path}
+        for _ in range(len(self.nodes)):
+            if len(self.nodes) <= self.max_nodes:
+                break
+            key, node = self.nodes.popitem(last=False)
+            if key in protected:
+                self.nodes[key] = node  # Узел текущего пути переносится в конец очереди
+            else:
+                self.evicted += 1
+
+    @property
+    def node(self):
+        """Текущий узел."""
+        key = self.path[-1][0]
+        self.nodes.move_to_end(key)
+        return self.nodes[key]
+
+    def path_text(self):
+        """Ходы от корня до текущего узла."""
+        return ', '.join(f"{start}-{end}" for _, (start, end) in self.path[1:])
+
+    def go(self, start, end):
+        """Переходит в дочерний узел по ходу.
+
+        Returns:
+            bool: True, если ход возможен.
+        """
+        node, move = self.node, (start, end)
+        if move not in node.moves and move not in node.pull(until=move):
+            return False
+        self.game.board.make_move(start, end)
+        self.game.turn = 'black' if self.game.turn == 'white' else 'white'
+        key = self._node_for(self.game)
+        node.children[move] = key
+        self.path.append((key, move))
+        self._evict()
+        return True
+
+    def up(self):
+        """Возвращается к родительскому узлу."""
+        if len(self.path) > 1:
+            self.path.pop()
+            self.game = Game.from_position(self.node.position)
+            self._evict()
+
+    def root(self):
+        """Возвращается к корню."""
+        del self.path[1:]
+        self.game = Game.from_position(self.node.position)
+        self._evict()
+
+    def list_moves(self, more=False):
+        """Показывает ходы текущего узла страницами по EXPLORE_PAGE.
+
+        Звездочкой отмечены ходы, узлы которых есть в памяти.
+        """
+        node = self.node
+        if more:
+            shown = node.pull(EXPLORE_PAGE)
+        else:
+            if not node.moves:
+                node.pull(EXPLORE_PAGE)
+            shown = node.moves
+        if not node.moves:
+            print("Нет возможных ходов.")
+            return
+        for move in shown:
+            mark = '*' if node.children.get(move) in self.nodes else ' '
+            print(f"{mark} {move[0]} {move[1]}")
+        if not node.complete:
+            print("... (more — следующие ходы)")
+
+    def handle(self, command):
+        """Выполняет команду просмотра вариантов.
+
+        Returns:
+            bool: False, если просмотр нужно завершить.
+        """
+        words = command.split()
+        if not words:
+            return True
+        if words[0] in ('quit', 'exit'):
+            return False
+        if words[0] in ('ls', 'more'):
+            self.list_moves(words[0] == 'more')
+        elif words[0] == 'up':
+            self.up()
+        elif words[0] == 'root':
+            self.root()
+        elif words[0] == 'board':
+            self.game.board.print_board()
+        elif words[0] == 'path':
+            print(self.path_text() or "Начальная позиция.")
+        elif words[0] == 'best':
+            self.game.best_move()
+        elif words[0] == 'stats':
+            print(f"Узлов в памяти: {len(self.nodes)} из {self.max_nodes}, вытеснено: {self.evicted}")
+        else:
+            if words[0] == 'go':
+                words = words[1:]
+            if len(words) != 2:
+                print("Неверный формат команды. Повторите попытку.")
+            elif not self.go(*words):
+                print("Неверный ход. Повторите попытку.")
+        return True
+
 if __name__ == "__main__":
-    print("Выберите игру: 1 - Шахматы, 2 - Шашки")
-    choice = input().strip()
-    if choice == '1':
-        game = Game()
-    elif choice == '2':
-        game = CheckersGame()
+    if os.environ.get('CHESS_PROFILE'):
+        import profiling
+        profiling.enable(os.environ['CHESS_PROFILE'], sys.modules[__name__])
+    parser = argparse.ArgumentParser(description="Шахматы и шашки в терминале.")
+    parser.add_argument('--ponder', action='store_true', help="анализировать позицию, пока игрок думает")
+    parser.add_argument('--size', type=int, default=8, help="размер доски (например, 10 для доски 10x10)")
+    parser.add_argument('--journal', metavar='FILE',
+                        help="журнал партии: продолжить партию из него или начать запись в новый файл")
+    args = parser.parse_args()
+    if args.journal and os.path.exists(args.journal) and os.path.getsize(args.journal):
+        game = Journal.restore(args.journal, args.ponder)
+        print(f"Партия восстановлена из журнала {args.journal}")
     else:
-        print("Неверный выбор, запускаются шахматы по умолчанию.")
-        game = Game()
+        print("Выберите игру: 1 - Шахматы, 2 - Шашки")
+        choice = input().strip()
+        if choice == '1':
+            game = Game(args.ponder, args.size, args.size)
+        elif choice == '2':
+            game = CheckersGame(args.ponder, args.size, args.size)
+        else:
+            print("Неверный выбор, запускаются шахматы по умолчанию.")
+            game = Game(args.ponder, args.size, args.size)
+        if args.journal:
+            game.attach_journal(Journal(args.journal))
     game.play()
\ No newline at end of file
@@ -0,0 +1,139 @@
+"""Пакетная оценка позиций с помощью NumPy.
+
+Доски кодируются в массив плоскостей формы (N, 18, H, W): по одной
+плоскости на каждый символ фигуры, используемый классом Board. Оценка
+(материал и таблицы позиционных бонусов) считается одной векторной
+операцией для всей пачки досок.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+from chess import PIECE_SYMBOLS, PIECE_VALUES
+
+# Порядок плоскостей: сначала белые фигуры, затем черные, в порядке PIECE_DEFINITIONS.
+# Символы шашек (W, b, K, k) совпадают с шахматными, поэтому отдельные
+# плоскости для них не нужны — смысл плоскости задается типом игры.
+PLANE_SYMBOLS = PIECE_SYMBOLS.upper() + PIECE_SYMBOLS
+PLANE_INDEX = {symbol: index for index, symbol in enumerate(PLANE_SYMBOLS)}
+_SYMBOL_ARRAY = np.array(list(PLANE_SYMBOLS), dtype='<U1')
+
+CENTER_BONUS = 4
+ADVANCE_BONUS = 10
+
+
+def encode_boards(boards, height=None, width=None):
+    """Кодирует последовательность досок одного размера в пачку плоскостей.
+
+    Args:
+        boards (list): Список досок (Board).
+        height (int): Число горизонталей; по умолчанию берется из первой доски.
+        width (int): Число вертикалей; по умолчанию берется из первой доски.
+
+    Returns:
+        numpy.ndarray: Массив формы (N, 18, H, W) типа int8.
+
+    Raises:
+        ValueError: Если доски разного размера или список пуст, а размер не указан.
+    """
+    boards = list(boards)
+    if boards:
+        height = boards[0].height if height is None else height
+        width = boards[0].width if width is None else width
+    elif height is None or width is None:
+        raise ValueError("Для пустого списка досок нужно указать height и width.")
+    for board in boards:
+        if (board.height, board.width) != (height, width):
+            raise ValueError(f"Доски разного размера: {board.width}x{board.height} вместо {width}x{height}.")
+    if not boards:
+        return np.zeros((0, len(PLANE_SYMBOLS), height, width), dtype=np.int8)
+    squares = np.array([board.board for board in boards], dtype='<U1')
+    return (squares[:, None] == _SYMBOL_ARRAY[None, :, None, None]).astype(np.int8)
+
+
+def encode_board(board):
+    """Кодирует доску в массив плоскостей.
+
+    Args:
+        board (Board): Доска для кодирования.
+
+    Returns:
+        numpy.ndarray: Массив плоскостей формы (18, H, W) типа int8.
+    """
+    return encode_boards([board])[0]
+
+
+@lru_cache(maxsize=None)
+def piece_square_weights(game_type, height=8, width=8):
+    """Строит тензор весов: стоимость фигуры плюс позиционный бонус.
+
+    Вес положительный для белых фигур и отрицательный для черных.
+
+    Args:
+        game_type (str): Тип игры ('chess' или 'checkers').
+        height (int): Число горизонталей доски.
+        width (int): Число вертикалей доски.
+
+    Returns:
+        numpy.ndarray: Массив формы (18, height, width) типа int32.
+    """
+    values = PIECE_VALUES[game_type]
+    rows = np.arange(height).reshape(-1, 1)
+    cols = np.arange(width).reshape(1, -1)
+    # Чем ближе к центру, тем больше бонус (в удвоенных единицах, чтобы
+    # обойтись целыми числами на досках четного размера).
+    distance = np.abs(2 * rows - (height - 1)) + np.abs(2 * cols - (width - 1))
+    center = CENTER_BONUS * (height + width - 2 - distance) // 2
+    white_advance = np.broadcast_to(ADVANCE_BONUS * (height - 1 - rows), (height, width))
+    black_advance = np.broadcast_to(ADVANCE_BONUS * rows, (height, width))
+    movers = 'pwb' if game_type == 'checkers' else 'p'
+
+    weights = np.zeros((len(PLANE_SYMBOLS), height, width), dtype=np.int32)
+    for symbol, index in PLANE_INDEX.items():
+        kind = symbol.lower()
+        if kind not in values:
+            continue
+        white = symbol.isupper()
+        table = values[kind] + center
+        if kind in movers:
+            table = table + (white_advance if white else black_advance)
+        weights[index] = table if white else -table
+    weights.setflags(write=False)
+    return weights
+
+
+def evaluate_batch(planes, game_type='chess'):
+    """Оценивает пачку позиций одной векторной операцией.
+
+    Args:
+        planes (numpy.ndarray): Массив плоскостей формы (N, 18, H, W).
+        game_type (str): Тип игры ('chess' или 'checkers').
+
+    Returns:
+        numpy.ndarray: Оценки позиций с точки зрения белых, форма (N,).
+    """
+    planes = np.asarray(planes)
+    if planes.ndim != 4 or planes.shape[1] != len(PLANE_SYMBOLS):
+        raise ValueError(f"Ожидается массив формы (N, {len(PLANE_SYMBOLS)}, H, W), получено {planes.shape}")
+    weights = piece_square_weights(game_type, planes.shape[2], planes.shape[3])
+    return np.einsum('nphw,phw->n', planes, weights, dtype=np.int64)
+
+
+def evaluate_boards(boards, game_type=None):
+    """Кодирует и оценивает список досок.
+
+    Args:
+        boards (list): Список досок (Board) одного размера и типа игры.
+        game_type (str): Тип игры; по умолчанию берется из первой доски.
+
+    Returns:
+        numpy.ndarray: Оценки позиций с точки зрения белых, форма (N,).
+    """
+    boards = list(boards)
+    if not boards:
+        return np.zeros(0, dtype=np.int64)
+    if game_type is None:
+        game_type = boards[0].game_type
+    return evaluate_batch(encode_boards(boards), game_type)
+
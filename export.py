@@ -0,0 +1,259 @@
+"""Потоковая выгрузка обучающих данных в шарды .npy.
+
+Партии (файлы Game.save_game или партии самоигры) переигрываются через
+Board.make_move. Каждая позиция кодируется в тензор плоскостей, к нему
+добавляются метки хода и исхода партии. Данные пишутся в memmap-файлы
+фиксированного размера, поэтому расход памяти не зависит от объема корпуса.
+
+Пример запуска:
+    python export.py games/*.txt --out data/train --shard-size 100000
+    python export.py --self-play 1000 --out data/selfplay
+"""
+
+import argparse
+import os
+import random
+
+import numpy as np
+
+from chess import CheckersGame, Game, parse_saved_move
+from evaluation import PLANE_SYMBOLS, encode_board
+
+
+class ShardWriter:
+    """Записывает позиции в шарды .npy через memmap.
+
+    Каждый шард состоит из трех файлов с общим префиксом:
+    <prefix>-NNNNN.planes.npy — плоскости (N, 18, H, W) типа int8,
+    <prefix>-NNNNN.moves.npy — индекс хода (откуда * H * W + куда) типа int32,
+    <prefix>-NNNNN.outcomes.npy — исход партии для белых (1, 0, -1) типа int8.
+    """
+
+    def __init__(self, prefix, shard_size=100000, height=8, width=8):
+        """Инициализация записи шардов.
+
+        Args:
+            prefix (str): Путь и префикс имен файлов шардов.
+            shard_size (int): Число позиций в одном шарде.
+            height (int): Число горизонталей доски.
+            width (int): Число вертикалей доски.
+        """
+        if shard_size <= 0:
+            raise ValueError("Размер шарда должен быть положительным.")
+        self.prefix = prefix
+        self.shard_size = shard_size
+        self.plane_shape = (len(PLANE_SYMBOLS), height, width)
+        self.shard_index = 0
+        self.count = 0
+        self.total = 0
+        self.paths = []
+        self._arrays = None
+
+    def _path(self, index, name):
+        return f"{self.prefix}-{index:05d}.{name}.npy"
+
+    def _open_shard(self):
+        directory = os.path.dirname(self.prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        open_memmap = np.lib.format.open_memmap
+        self._arrays = {
+            'planes': open_memmap(self._path(self.shard_index, 'planes'), mode='w+',
+                                  dtype=np.int8, shape=(self.shard_size,) + self.plane_shape),
+            'moves': open_memmap(self._path(self.shard_index, 'moves'), mode='w+',
+                                 dtype=np.int32, shape=(self.shard_size,)),
+            'outcomes': open_memmap(self._path(self.shard_index, 'outcomes'), mode='w+',
+                                    dtype=np.int8, shape=(self.shard_size,)),
+        }
+        self.count = 0
+
+    def _close_shard(self):
+        if self._arrays is None:
+            return
+        arrays, self._arrays = self._arrays, None
+        for name, array in arrays.items():
+            path = self._path(self.shard_index, name)
+            if self.count < self.shard_size:
+                # Последний шард неполный: переписываем только заполненную часть.
+                trimmed = np.lib.format.open_memmap(path + '.tmp', mode='w+', dtype=array.dtype,
+                                                    shape=(self.count,) + array.shape[1:])
+                trimmed[:] = array[:self.count]
+                trimmed.flush()
+                del trimmed
+                del array
+                os.replace(path + '.tmp', path)
+            else:
+                array.flush()
+                del array
+            self.paths.append(path)
+        self.shard_index += 1
+
+    def add(self, planes, move, outcome):
+        """Добавляет одну позицию.
+
+        Args:
+            planes (numpy.ndarray): Плоскости позиции формы (18, H, W).
+            move (int): Индекс сделанного в позиции хода.
+            outcome (int): Исход партии для белых.
+        """
+        if self._arrays is None:
+            self._open_shard()
+        self._arrays['planes'][self.count] = planes
+        self._arrays['moves'][self.count] = move
+        self._arrays['outcomes'][self.count] = outcome
+        self.count += 1
+        self.total += 1
+        if self.count == self.shard_size:
+            self._close_shard()
+
+    def close(self):
+        """Сбрасывает на диск последний шард."""
+        self._close_shard()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def new_game(game_type, height=8, width=8):
+    """Создает новую партию указанного типа и размера."""
+    if game_type == 'checkers':
+        return CheckersGame(height=height, width=width)
+    return Game(height=height, width=width)
+
+
+def read_saved_moves(filename):
+    """Читает ходы из файла, сохраненного Game.save_game.
+
+    Args:
+        filename (str): Имя файла партии.
+
+    Yields:
+        tuple: Пары (начальная позиция, конечная позиция).
+    """
+    with open(filename, 'r') as file:
+        for line in file:
+            if line.strip():
+                piece, start, end = parse_saved_move(line)
+                yield start, end
+
+
+def game_outcome(board):
+    """Определяет исход партии по итоговой позиции.
+
+    В шахматах проигрывает сторона, потерявшая короля, в шашках — сторона
+    без шашек. Во всех остальных случаях исход считается ничейным.
+
+    Returns:
+        int: 1 — победа белых, -1 — победа черных, 0 — нет результата.
+    """
+    symbols = {symbol for row in board.board for symbol in row}
+    if board.game_type == 'checkers':
+        white = bool(symbols & {'W', 'K'})
+        black = bool(symbols & {'b', 'k'})
+    else:
+        white = 'K' in symbols
+        black = 'k' in symbols
+    if white and not black:
+        return 1
+    if black and not white:
+        return -1
+    return 0
+
+
+def move_index(board, start, end):
+    """Кодирует ход в одно целое число: откуда * (H * W) + куда."""
+    width = len(board.board[0])
+    squares = len(board.board) * width
+    start_row, start_col = board.parse_position(start)
+    end_row, end_col = board.parse_position(end)
+    return (start_row * width + start_col) * squares + end_row * width + end_col
+
+
+def export_game(writer, moves, game_type='chess', height=8, width=8):
+    """Переигрывает партию и записывает все ее позиции.
+
+    Партия переигрывается дважды: сначала для определения исхода, затем
+    для записи позиций. Так в памяти хранится только список ходов.
+
+    Args:
+        writer (ShardWriter): Получатель позиций.
+        moves (list): Ходы партии — пары (начальная позиция, конечная позиция).
+        game_type (str): Тип игры ('chess' или 'checkers').
+        height (int): Число горизонталей доски.
+        width (int): Число вертикалей доски.
+
+    Returns:
+        int: Число записанных позиций.
+    """
+    moves = list(moves)
+    game = new_game(game_type, height, width)
+    for start, end in moves:
+        game.board.make_move(start, end)
+    outcome = game_outcome(game.board)
+
+    game = new_game(game_type, height, width)
+    for start, end in moves:
+        writer.add(encode_board(game.board), move_index(game.board, start, end), outcome)
+        game.board.make_move(start, end)
+    return len(moves)
+
+
+def self_play_games(count, game_type='chess', max_plies=200, seed=None, height=8, width=8):
+    """Генерирует партии самоигры случайными ходами.
+
+    Args:
+        count (int): Число партий.
+        game_type (str): Тип игры ('chess' или 'checkers').
+        max_plies (int): Максимальная длина партии в полуходах.
+        seed (int): Начальное значение генератора случайных чисел.
+        height (int): Число горизонталей доски.
+        width (int): Число вертикалей доски.
+
+    Yields:
+        list: Ходы очередной партии.
+    """
+    rng = random.Random(seed)
+    for _ in range(count):
+        game = new_game(game_type, height, width)
+        moves = []
+        while len(moves) < max_plies and not game_outcome(game.board) and not game.board.is_draw():
+            candidates = game.legal_moves()
+            if not candidates:
+                break
+            start, end = rng.choice(candidates)
+            game.board.make_move(start, end)
+            game.turn = 'black' if game.turn == 'white' else 'white'
+            moves.append((start, end))
+        yield moves
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Выгрузка обучающих данных в шарды .npy.")
+    parser.add_argument('files', nargs='*', help="файлы партий, сохраненные командой save")
+    parser.add_argument('--out', required=True, help="префикс имен файлов шардов")
+    parser.add_argument('--shard-size', type=int, default=100000, help="позиций в одном шарде")
+    parser.add_argument('--game-type', choices=['chess', 'checkers'], default='chess')
+    parser.add_argument('--size', type=int, default=8, help="размер доски")
+    parser.add_argument('--self-play', type=int, default=0, metavar='N',
+                        help="дополнительно сыграть N партий случайными ходами")
+    parser.add_argument('--max-plies', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    games = 0
+    with ShardWriter(args.out, args.shard_size, args.size, args.size) as writer:
+        for filename in args.files:
+            export_game(writer, read_saved_moves(filename), args.game_type, args.size, args.size)
+            games += 1
+        for moves in self_play_games(args.self_play, args.game_type, args.max_plies, args.seed,
+                                     args.size, args.size):
+            export_game(writer, moves, args.game_type, args.size, args.size)
+            games += 1
+    print(f"Записано позиций: {writer.total} из {games} партий, шардов: {writer.shard_index}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Генератор нагрузки для server.py.
+
+Открывает заданное число одновременных сессий, в каждой повторяет
+сценарий команд и измеряет задержку каждого запроса. В конце печатает
+p50/p99 по всем запросам и по каждой команде.
+
+Пример запуска:
+    python loadgen.py --sessions 1000 --rounds 5 --port 8765
+"""
+
+import argparse
+import asyncio
+import time
+
+# Волшебники ходят туда и обратно, поэтому сценарий можно повторять.
+CHESS_SCRIPT = [
+    'board', 'b1 c3', 'hint c6', 'b8 c6', 'threats c3', 'hint c3',
+    'c3 b1', 'c6 b8', 'back', 'next',
+]
+CHECKERS_SCRIPT = ['new checkers', 'hint c3', 'threats d4', 'c3 d4', 'back', 'board', 'new chess']
+
+
+def percentile(values, fraction):
+    """Возвращает перцентиль отсортированного списка."""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(fraction * len(values)))
+    return values[index]
+
+
+async def request(reader, writer, command):
+    """Отправляет команду и читает ответ до строки-терминатора.
+
+    Returns:
+        list: Строки ответа.
+    """
+    writer.write(command.encode('utf-8') + b'\n')
+    await writer.drain()
+    lines = []
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("Сервер закрыл соединение")
+        text = line.decode('utf-8').rstrip('\n')
+        if text == '.':
+            return lines
+        lines.append(text[1:] if text.startswith('..') else text)
+
+
+async def run_session(host, port, script, rounds, latencies):
+    """Проигрывает сценарий в одной сессии, добавляя задержки в latencies."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(rounds):
+            for command in script:
+                start = time.perf_counter()
+                await request(reader, writer, command)
+                name = command.split()[0] if command.split()[0].isalpha() else 'move'
+                latencies.setdefault(name, []).append(time.perf_counter() - start)
+        await request(reader, writer, 'exit')
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def run_load(host, port, sessions, rounds, checkers_share=0.25):
+    """Запускает сессии одновременно и возвращает задержки по командам."""
+    latencies = {}
+    checkers_every = round(1 / checkers_share) if checkers_share else 0
+    tasks = []
+    for index in range(sessions):
+        script = CHECKERS_SCRIPT if checkers_every and index % checkers_every == 0 else CHESS_SCRIPT
+        tasks.append(run_session(host, port, script, rounds, latencies))
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    errors = [result for result in results if isinstance(result, Exception)]
+    return latencies, errors
+
+
+def report(latencies, errors, elapsed):
+    """Печатает сводку задержек."""
+    everything = sorted(value for values in latencies.values() for value in values)
+    print(f"Запросов: {len(everything)}, ошибок сессий: {len(errors)}, время: {elapsed:.2f} с, "
+          f"{len(everything) / elapsed:.0f} запросов/с")
+    print(f"{'команда':10} {'число':>8} {'p50, мс':>10} {'p99, мс':>10}")
+    for name in sorted(latencies):
+        values = sorted(latencies[name])
+        print(f"{name:10} {len(values):8} {percentile(values, 0.5) * 1000:10.2f} {percentile(values, 0.99) * 1000:10.2f}")
+    print(f"{'всего':10} {len(everything):8} {percentile(everything, 0.5) * 1000:10.2f} {percentile(everything, 0.99) * 1000:10.2f}")
+    if errors:
+        print(f"Первая ошибка: {errors[0]!r}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Генератор нагрузки для server.py.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--sessions', type=int, default=100, help="одновременных сессий")
+    parser.add_argument('--rounds', type=int, default=3, help="повторов сценария в каждой сессии")
+    parser.add_argument('--checkers-share', type=float, default=0.25, help="доля шашечных сессий")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    latencies, errors = asyncio.run(run_load(args.host, args.port, args.sessions, args.rounds, args.checkers_share))
+    report(latencies, errors, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
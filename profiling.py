@@ -0,0 +1,253 @@
+"""Необязательная инструментация горячих методов игры.
+
+После вызова enable() методы доски, фигур и игры оборачиваются счетчиками
+вызовов и таймерами, а каждая команда Game.play попадает в гистограмму
+задержек. При выходе из программы статистика сохраняется в JSON или в
+формате cProfile (файл читается pstats.Stats и snakeviz).
+
+Включение из консоли:
+    CHESS_PROFILE=profile.json python chess.py
+    CHESS_PROFILE=profile.prof python chess.py
+"""
+
+import atexit
+import functools
+import json
+import marshal
+import threading
+import time
+
+# Границы корзин гистограммы задержек команд, в миллисекундах.
+HISTOGRAM_BOUNDS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000)
+
+BOARD_METHODS = ('make_move', 'undo_move', 'redo_move', 'print_board')
+PIECE_METHODS = ('get_possible_moves', 'is_valid_move')
+GAME_METHODS = ('hint', 'threats', 'save_game', 'load_game')
+
+
+class FunctionStats:
+    """Накопленная статистика одного метода."""
+
+    def __init__(self, key):
+        self.key = key
+        self.calls = 0
+        self.total_time = 0.0
+        self.own_time = 0.0
+        self.callers = {}
+
+
+class Profiler:
+    """Собирает счетчики, время методов и гистограммы задержек команд.
+
+    Стек вызовов свой у каждого потока (например, у фонового анализа
+    Ponderer), а общие счетчики обновляются под блокировкой.
+    """
+
+    def __init__(self):
+        self.functions = {}
+        self.commands = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._patched = []
+
+    def _thread_state(self):
+        """Возвращает стек вызовов и счетчики вложенности текущего потока."""
+        local = self._local
+        try:
+            return local.stack, local.active
+        except AttributeError:
+            local.stack, local.active = [], {}
+            return local.stack, local.active
+
+    def wrap(self, owner, name, key):
+        """Заменяет метод owner.name на версию с замером времени.
+
+        Args:
+            owner (type): Класс, которому принадлежит метод.
+            name (str): Имя метода.
+            key (tuple): Ключ статистики (файл, строка, имя функции).
+        """
+        original = owner.__dict__[name]
+        stats = self.functions.setdefault(key, FunctionStats(key))
+        thread_state = self._thread_state
+        lock = self._lock
+
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            stack, active = thread_state()
+            caller = stack[-1] if stack else None
+            frame = [stats, 0.0]
+            stack.append(frame)
+            active[key] = depth = active.get(key, 0) + 1
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                stack.pop()
+                active[key] = depth - 1
+                if caller is not None:
+                    caller[1] += elapsed
+                with lock:
+                    stats.calls += 1
+                    stats.own_time += elapsed - frame[1]
+                    # При рекурсии полное время считается только на внешнем уровне.
+                    if depth == 1:
+                        stats.total_time += elapsed
+                    if caller is not None:
+                        calls, total = stats.callers.get(caller[0].key, (0, 0.0))
+                        stats.callers[caller[0].key] = (calls + 1, total + elapsed)
+
+        setattr(owner, name, wrapper)
+        self._patched.append((owner, name, original))
+
+    def wrap_commands(self, owner):
+        """Оборачивает handle_command, собирая гистограммы задержек команд."""
+        original = owner.__dict__['handle_command']
+
+        @functools.wraps(original)
+        def handle_command(game, command, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(game, command, *args, **kwargs)
+            finally:
+                self.record_command(command, time.perf_counter() - start)
+
+        setattr(owner, 'handle_command', handle_command)
+        self._patched.append((owner, 'handle_command', original))
+
+    def record_command(self, command, elapsed):
+        """Добавляет задержку команды в гистограмму.
+
+        Args:
+            command (str): Введенная команда; ходы вида 'e2 e4' учитываются как 'move'.
+            elapsed (float): Время выполнения в секундах.
+        """
+        words = command.split()
+        name = words[0] if words and words[0].isalpha() else 'move'
+        elapsed_ms = elapsed * 1000
+        with self._lock:
+            entry = self.commands.get(name)
+            if entry is None:
+                entry = self.commands[name] = {
+                    'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                    'buckets': [0] * (len(HISTOGRAM_BOUNDS_MS) + 1),
+                }
+            entry['count'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            for index, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+                if elapsed_ms <= bound:
+                    break
+            else:
+                index = len(HISTOGRAM_BOUNDS_MS)
+            entry['buckets'][index] += 1
+
+    def restore(self):
+        """Возвращает исходные методы."""
+        while self._patched:
+            owner, name, original = self._patched.pop()
+            setattr(owner, name, original)
+
+    def as_dict(self):
+        """Возвращает статистику в виде словаря, пригодного для JSON."""
+        with self._lock:
+            functions = {}
+            for key, stats in self.functions.items():
+                if stats.calls:
+                    functions[key[2]] = {
+                        'calls': stats.calls,
+                        'total_ms': stats.total_time * 1000,
+                        'own_ms': stats.own_time * 1000,
+                        'mean_us': stats.total_time * 1e6 / stats.calls,
+                    }
+            commands = {}
+            for name, entry in self.commands.items():
+                commands[name] = dict(entry, mean_ms=entry['total_ms'] / entry['count'])
+        return {
+            'histogram_bounds_ms': list(HISTOGRAM_BOUNDS_MS),
+            'commands': commands,
+            'functions': functions,
+        }
+
+    def dump_json(self, filename):
+        """Сохраняет статистику в JSON."""
+        with open(filename, 'w') as file:
+            json.dump(self.as_dict(), file, ensure_ascii=False, indent=2)
+
+    def dump_pstats(self, filename):
+        """Сохраняет статистику в формате cProfile.
+
+        Файл открывается стандартными средствами: pstats.Stats(filename).
+        """
+        stats = {}
+        with self._lock:
+            for key, entry in self.functions.items():
+                if entry.calls:
+                    callers = {caller: (calls, calls, total, total)
+                               for caller, (calls, total) in entry.callers.items()}
+                    stats[key] = (entry.calls, entry.calls, entry.own_time, entry.total_time, callers)
+        with open(filename, 'wb') as file:
+            marshal.dump(stats, file)
+
+    def dump(self, filename):
+        """Сохраняет статистику; формат выбирается по расширению файла."""
+        if filename.endswith('.json'):
+            self.dump_json(filename)
+        else:
+            self.dump_pstats(filename)
+
+
+def _method_key(owner, name):
+    function = owner.__dict__[name]
+    code = function.__code__
+    return code.co_filename, code.co_firstlineno, f"{owner.__name__}.{name}"
+
+
+def _subclasses(cls):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from _subclasses(subclass)
+
+
+def instrument(module=None, profiler=None):
+    """Оборачивает горячие методы модуля chess.
+
+    Args:
+        module (module): Модуль с классами Board, Piece и Game; по умолчанию chess.
+        profiler (Profiler): Профилировщик; по умолчанию создается новый.
+
+    Returns:
+        Profiler: Профилировщик, собирающий статистику.
+    """
+    if module is None:
+        import chess as module
+    if profiler is None:
+        profiler = Profiler()
+
+    targets = [(module.Board, BOARD_METHODS)]
+    targets += [(cls, PIECE_METHODS) for cls in [module.Piece, *_subclasses(module.Piece)]]
+    targets += [(cls, GAME_METHODS) for cls in [module.Game, *_subclasses(module.Game)]]
+    for owner, names in targets:
+        for name in names:
+            if name in owner.__dict__:
+                profiler.wrap(owner, name, _method_key(owner, name))
+    for cls in [module.Game, *_subclasses(module.Game)]:
+        if 'handle_command' in cls.__dict__:
+            profiler.wrap_commands(cls)
+    return profiler
+
+
+def enable(filename, module=None):
+    """Включает инструментацию и сохранение статистики при выходе.
+
+    Args:
+        filename (str): Файл статистики (.json — JSON, иначе формат cProfile).
+        module (module): Модуль с классами игры; по умолчанию chess.
+
+    Returns:
+        Profiler: Профилировщик, собирающий статистику.
+    """
+    profiler = instrument(module)
+    atexit.register(profiler.dump, filename)
+    return profiler
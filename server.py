@@ -0,0 +1,328 @@
+"""Асинхронный сервер для множества одновременных партий.
+
+Каждое TCP-подключение — отдельная партия (Game или CheckersGame). Клиент
+посылает строки с теми же командами, что и в Game.play:
+
+    e2 e4 | back | next | hint e2 | threats e4 | save <имя> | load <имя> | exit
+
+и дополнительные команды сервера:
+
+    new chess | new checkers [размер] — начать новую партию,
+    board — показать доску,
+    journal <имя> — продолжить партию из журнала с этим именем или начать
+    записывать в него текущую партию (нужен --journal-dir).
+
+Ответ — вывод команды, завершенный строкой из одной точки. Строки вывода,
+начинающиеся с точки, дополняются еще одной точкой (как в SMTP). Тяжелые
+команды (hint, threats, best) выполняются в пуле процессов, чтобы не блокировать
+цикл событий; с флагом --shared-memory позиция передается процессу через
+общую память (shared_pool.PositionPool), а не сериализуется.
+
+Пример запуска:
+    python server.py --port 8765 --workers 4
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from chess import CheckersGame, Game, Journal
+from shared_pool import PositionPool
+
+HEAVY_COMMANDS = ('hint', 'threats', 'best')
+SHARED_SLOTS = 1024  # Позиций в общей памяти; если все заняты, доска сериализуется
+TERMINATOR = '.'
+
+
+def new_game(game_type, size=8):
+    """Создает новую партию указанного типа и размера."""
+    if game_type == 'checkers':
+        return CheckersGame(height=size, width=size)
+    return Game(height=size, width=size)
+
+
+def run_command(game, command):
+    """Выполняет команду партии и возвращает ее вывод.
+
+    Returns:
+        tuple: (вывод команды, продолжать ли сессию).
+    """
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        try:
+            game.handle_command(command)
+        except (IndexError, ValueError, OSError) as error:
+            print(f"Ошибка: {error}")
+    # Ничья не закрывает сессию: клиент может начать новую партию командой new.
+    return output.getvalue(), command != 'exit'
+
+
+def clock_state(game):
+    """Возвращает состояние партии, которого нет в позиции, но которое нужно для учета ничьих.
+
+    Returns:
+        tuple: (сделано полуходов, полуходов без прогресса, счетчики повторений позиций).
+    """
+    return game.move_count, game.board.halfmove_clock, game.board.position_counts
+
+
+def restore_clocks(game, clocks):
+    """Переносит в партию состояние, полученное от clock_state."""
+    game.move_count, game.board.halfmove_clock, counts = clocks
+    game.board.position_counts = dict(counts)
+    return game
+
+
+def run_heavy_command(position, clocks, command):
+    """Выполняет тяжелую команду в процессе пула.
+
+    Args:
+        position (str): Строка позиции (см. Board.to_position).
+        clocks (tuple): Состояние партии (см. clock_state).
+        command (str): Команда.
+
+    Returns:
+        str: Вывод команды.
+    """
+    return run_command(restore_clocks(Game.from_position(position), clocks), command)[0]
+
+
+_positions = {}  # Пул позиций в процессе-обработчике
+
+
+def init_shared_worker(pool_name):
+    """Подключает процесс пула к общей памяти с позициями."""
+    _positions['pool'] = PositionPool(name=pool_name)
+
+
+def run_heavy_slot(slot, clocks, command):
+    """Выполняет тяжелую команду для позиции из ячейки общей памяти.
+
+    Returns:
+        str: Вывод команды.
+    """
+    return run_command(restore_clocks(_positions['pool'].get_game(slot), clocks), command)[0]
+
+
+def encode_response(text):
+    """Превращает вывод команды в ответ протокола."""
+    lines = text.splitlines()
+    stuffed = ['.' + line if line.startswith('.') else line for line in lines]
+    return '\n'.join(stuffed + [TERMINATOR]) + '\n'
+
+
+class Session:
+    """Состояние одного подключения."""
+
+    def __init__(self, game_type='chess'):
+        self.game = new_game(game_type)
+        self.journal = None
+
+    def replace_game(self, game):
+        """Начинает новую партию, продолжая запись в журнал сессии."""
+        self.game = game
+        if self.journal is not None:
+            game.attach_journal(self.journal)
+
+    def close(self):
+        """Закрывает журнал сессии и отключает его от партии."""
+        if self.journal is not None:
+            self.journal.close()
+            self.game.journal = self.game.board.journal = None
+            self.journal = None
+
+
+class GameServer:
+    """Сервер партий поверх asyncio."""
+
+    def __init__(self, save_dir='saves', workers=None, journal_dir=None, shared=False):
+        """Инициализация сервера.
+
+        Args:
+            save_dir (str): Каталог для команд save и load.
+            workers (int): Число процессов для тяжелых команд.
+            journal_dir (str): Каталог журналов партий (None — журналы отключены).
+            shared (bool): Передавать позиции процессам через общую память.
+        """
+        self.save_dir = save_dir
+        self.journal_dir = journal_dir
+        self.positions = PositionPool(SHARED_SLOTS) if shared else None
+        self.free_slots = deque(range(SHARED_SLOTS)) if shared else deque()
+        # forkserver: процессы пула не наследуют сокеты клиентов и не держат соединения открытыми.
+        context = multiprocessing.get_context('forkserver')
+        if shared:
+            self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                            initializer=init_shared_worker, initargs=(self.positions.name,))
+        else:
+            self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        self.sessions = 0
+        self.peak_sessions = 0
+
+    async def handle_client(self, reader, writer):
+        """Обслуживает одно подключение — одну партию."""
+        self.sessions += 1
+        self.peak_sessions = max(self.peak_sessions, self.sessions)
+        session = Session()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode('utf-8', 'replace').strip().lower()
+                if not command:
+                    continue
+                text, keep_going = await self.execute(session, command)
+                await self.sync_journal(session)
+                writer.write(encode_response(text).encode('utf-8'))
+                await writer.drain()
+                if not keep_going:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            if session.journal is not None:
+                await asyncio.get_running_loop().run_in_executor(None, session.close)
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def execute(self, session, command):
+        """Выполняет команду сессии.
+
+        Returns:
+            tuple: (вывод команды, продолжать ли сессию).
+        """
+        game = session.game
+        words = command.split()
+        if words[0] == 'new':
+            game_type = words[1] if len(words) > 1 else 'chess'
+            if game_type not in ('chess', 'checkers'):
+                return "Неизвестный тип игры. Используйте chess или checkers.", True
+            try:
+                session.replace_game(new_game(game_type, int(words[2]) if len(words) > 2 else 8))
+            except ValueError as error:
+                return f"Ошибка: {error}", True
+            return self.render(session.game), True
+        if words[0] == 'board':
+            return self.render(game), True
+        if words[0] == 'explore':
+            return "Команда explore доступна только в терминальной игре.", True
+        if words[0] == 'journal':
+            if session.journal is not None:
+                await asyncio.get_running_loop().run_in_executor(None, session.close)
+            return self.open_journal(session, words[1] if len(words) > 1 else None), True
+        if words[0] in ('save', 'load'):
+            if len(words) < 2:
+                return "Укажите имя файла.", True
+            # Клиент выбирает только имя файла внутри каталога сервера.
+            os.makedirs(self.save_dir, exist_ok=True)
+            command = f"{words[0]} {os.path.join(self.save_dir, os.path.basename(words[1]))}"
+        if words[0] in HEAVY_COMMANDS:
+            return await self.run_heavy(game, command), True
+        result = run_command(game, command)
+        if session.journal is not None and session.journal.needs_checkpoint():
+            session.journal.checkpoint(session.game)
+        return result
+
+    @staticmethod
+    async def sync_journal(session):
+        """Выполняет отложенную работу журнала сессии (fsync, замену контрольной точкой) в потоке.
+
+        Журналы сервера открываются с inline_sync=False, поэтому медленный диск
+        не останавливает цикл событий для всех сессий.
+        """
+        journal = session.journal
+        if journal is not None and journal.sync_due():
+            await asyncio.get_running_loop().run_in_executor(None, journal.sync)
+
+    def open_journal(self, session, name):
+        """Подключает к сессии журнал: восстанавливает партию из него или начинает запись.
+
+        Returns:
+            str: Ответ клиенту.
+        """
+        if self.journal_dir is None:
+            return "Журналы отключены на сервере."
+        if name is None:
+            return "Укажите имя журнала."
+        os.makedirs(self.journal_dir, exist_ok=True)
+        filename = os.path.join(self.journal_dir, os.path.basename(name) + '.journal')
+        session.close()
+        try:
+            if os.path.exists(filename) and os.path.getsize(filename):
+                session.game = Journal.restore(filename, inline_sync=False)
+                message = f"Партия восстановлена из журнала {name}."
+            else:
+                session.game.attach_journal(Journal(filename, inline_sync=False))
+                message = f"Партия записывается в журнал {name}."
+        except (OSError, ValueError, IndexError) as error:
+            return f"Ошибка: {error}"
+        session.journal = session.game.journal
+        return self.render(session.game) + message
+
+    async def run_heavy(self, game, command):
+        """Выполняет тяжелую команду в пуле процессов.
+
+        Returns:
+            str: Вывод команды.
+        """
+        loop = asyncio.get_running_loop()
+        clocks = clock_state(game)
+        if self.free_slots:
+            slot = self.free_slots.popleft()
+            try:
+                self.positions.put(slot, game.board, game.turn, game.move_count)
+                return await loop.run_in_executor(self.pool, run_heavy_slot, slot, clocks, command)
+            except ValueError:
+                pass  # Доска не помещается в ячейку: передаем ее обычным способом
+            finally:
+                self.free_slots.append(slot)
+        return await loop.run_in_executor(self.pool, run_heavy_command, game.board.to_position(game.turn),
+                                          clocks, command)
+
+    @staticmethod
+    def render(game):
+        """Возвращает изображение доски и чей ход."""
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            game.board.print_board()
+            print(f"Ход {'белых' if game.turn == 'white' else 'черных'}.")
+        return output.getvalue()
+
+    async def serve(self, host='127.0.0.1', port=8765):
+        """Запускает сервер и обслуживает подключения до остановки."""
+        server = await asyncio.start_server(self.handle_client, host, port, backlog=4096)
+        addresses = ', '.join(str(sock.getsockname()) for sock in server.sockets)
+        print(f"Сервер слушает {addresses}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+            if self.positions is not None:
+                self.positions.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сервер шахматных и шашечных партий.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None, help="процессов для hint, threats и best")
+    parser.add_argument('--save-dir', default='saves', help="каталог для команд save и load")
+    parser.add_argument('--journal-dir', default=None, help="каталог журналов партий для команды journal")
+    parser.add_argument('--shared-memory', action='store_true',
+                        help="передавать позиции для hint, threats и best через общую память")
+    args = parser.parse_args(argv)
+    server = GameServer(args.save_dir, args.workers, args.journal_dir, args.shared_memory)
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(server.serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Передача позиций процессам-обработчикам через общую память.
+
+PositionPool — массив ячеек фиксированного размера в multiprocessing.shared_memory.
+Ячейка хранит тип игры, чей ход, размер доски, число сделанных полуходов
+и по одному байту на клетку, поэтому задача для процесса пула — это только
+номер ячейки, а обработчик читает позицию прямо из общей памяти без
+сериализации доски.
+
+ResultRing — кольцевой буфер в общей памяти, куда обработчики пишут
+результаты (записи переменной длины с номером задачи), а основной процесс
+их забирает.
+
+Пример:
+    with PositionPool(slots=256) as pool, ResultRing(1 << 20) as ring:
+        pool.put(0, game.board, game.turn, game.move_count)
+        ...  # в процессе пула: game = PositionPool(name=...).get_game(0)
+"""
+
+import struct
+import time
+from multiprocessing import shared_memory
+
+from chess import MAX_BOARD_SIZE, Board, Game, parse_position_string
+
+GAME_TYPES = ('chess', 'checkers')
+TURNS = ('white', 'black')
+SLOT_HEADER = struct.Struct('<BBBBI')  # тип игры, чей ход, высота, ширина, полуходов сделано
+RING_HEADER = struct.Struct('<QQ')  # позиция записи, позиция чтения
+RECORD_HEADER = struct.Struct('<II')  # номер задачи, длина данных
+
+
+class PositionPool:
+    """Пул позиций в общей памяти с ячейками фиксированного размера."""
+
+    def __init__(self, slots=None, cells=MAX_BOARD_SIZE * MAX_BOARD_SIZE, name=None):
+        """Создает пул или подключается к существующему.
+
+        Args:
+            slots (int): Число ячеек (только при создании).
+            cells (int): Максимальное число клеток доски в одной ячейке.
+            name (str): Имя существующего блока общей памяти; если не задано,
+                создается новый блок.
+        """
+        self.cells = cells
+        self.slot_size = SLOT_HEADER.size + cells
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=slots * self.slot_size)
+            self.owner = True
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.slots = self.memory.size // self.slot_size
+        self.name = self.memory.name
+
+    def put(self, slot, board, turn, move_count=0):
+        """Записывает позицию в ячейку.
+
+        Args:
+            slot (int): Номер ячейки.
+            board (Board): Доска.
+            turn (str): Чей ход.
+            move_count (int): Сколько полуходов сделано в партии.
+        """
+        self._put_rows(slot, board.board, board.game_type, turn, move_count)
+
+    def put_position(self, slot, position):
+        """Записывает в ячейку позицию из строки, не создавая доску.
+
+        Args:
+            slot (int): Номер ячейки.
+            position (str): Строка позиции (см. Board.to_position).
+        """
+        rows, game_type, turn = parse_position_string(position)
+        self._put_rows(slot, rows, game_type, turn)
+
+    def _put_rows(self, slot, rows, game_type, turn, move_count=0):
+        height, width = len(rows), len(rows[0])
+        if height * width > self.cells:
+            raise ValueError(f"Доска {width}x{height} не помещается в ячейку пула.")
+        offset = slot * self.slot_size
+        SLOT_HEADER.pack_into(self.memory.buf, offset, GAME_TYPES.index(game_type), TURNS.index(turn),
+                              height, width, move_count)
+        data = ''.join([''.join(row) for row in rows]).encode('ascii')
+        start = offset + SLOT_HEADER.size
+        self.memory.buf[start:start + len(data)] = data
+
+    def get(self, slot):
+        """Читает позицию из ячейки.
+
+        Returns:
+            tuple: (доска, чей ход, сколько полуходов сделано).
+        """
+        offset = slot * self.slot_size
+        game_type, turn, height, width, move_count = SLOT_HEADER.unpack_from(self.memory.buf, offset)
+        start = offset + SLOT_HEADER.size
+        data = bytes(self.memory.buf[start:start + height * width]).decode('ascii')
+        rows = [data[row * width:(row + 1) * width] for row in range(height)]
+        return Board.from_rows(rows, GAME_TYPES[game_type], TURNS[turn]), TURNS[turn], move_count
+
+    def get_game(self, slot):
+        """Читает позицию из ячейки и возвращает партию нужного типа."""
+        board, turn, move_count = self.get(slot)
+        game = Game.from_board(board, turn)
+        game.move_count = move_count
+        return game
+
+    def close(self):
+        """Отключается от общей памяти; создатель пула также освобождает ее."""
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ResultRing:
+    """Кольцевой буфер результатов в общей памяти.
+
+    Писать могут несколько процессов, читает один. Доступ защищен
+    блокировкой multiprocessing.Lock, которую нужно передать процессам пула
+    (например, через initializer). Если буфер заполнен, писатель ждет,
+    пока читатель освободит место.
+    """
+
+    def __init__(self, capacity=None, lock=None, name=None):
+        """Создает буфер или подключается к существующему.
+
+        Args:
+            capacity (int): Размер области данных в байтах (только при создании).
+            lock (multiprocessing.Lock): Общая блокировка.
+            name (str): Имя существующего блока общей памяти.
+        """
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=RING_HEADER.size + capacity)
+            RING_HEADER.pack_into(self.memory.buf, 0, 0, 0)
+            self.owner = True
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.capacity = self.memory.size - RING_HEADER.size
+        self.lock = lock
+        self.name = self.memory.name
+
+    def _copy_in(self, position, data):
+        start = position % self.capacity
+        first = min(len(data), self.capacity - start)
+        base = RING_HEADER.size
+        self.memory.buf[base + start:base + start + first] = data[:first]
+        self.memory.buf[base:base + len(data) - first] = data[first:]
+
+    def _copy_out(self, position, length):
+        start = position % self.capacity
+        first = min(length, self.capacity - start)
+        base = RING_HEADER.size
+        head = bytes(self.memory.buf[base + start:base + start + first])
+        return head + bytes(self.memory.buf[base:base + length - first])
+
+    def write(self, task, data, poll=0.001):
+        """Записывает результат задачи, дожидаясь свободного места.
+
+        Args:
+            task (int): Номер задачи.
+            data (bytes): Результат.
+            poll (float): Пауза между попытками, если буфер заполнен.
+        """
+        record = RECORD_HEADER.pack(task, len(data)) + data
+        if len(record) > self.capacity:
+            raise ValueError(f"Результат длиной {len(data)} байт больше буфера.")
+        while True:
+            with self.lock:
+                write, read = RING_HEADER.unpack_from(self.memory.buf, 0)
+                if self.capacity - (write - read) >= len(record):
+                    self._copy_in(write, record)
+                    RING_HEADER.pack_into(self.memory.buf, 0, write + len(record), read)
+                    return
+            time.sleep(poll)
+
+    def read(self):
+        """Забирает все записанные результаты.
+
+        Returns:
+            list: Пары (номер задачи, данные).
+        """
+        records = []
+        with self.lock:
+            write, read = RING_HEADER.unpack_from(self.memory.buf, 0)
+            while read < write:
+                task, length = RECORD_HEADER.unpack(self._copy_out(read, RECORD_HEADER.size))
+                records.append((task, self._copy_out(read + RECORD_HEADER.size, length)))
+                read += RECORD_HEADER.size + length
+            RING_HEADER.pack_into(self.memory.buf, 0, write, read)
+        return records
+
+    def close(self):
+        """Отключается от общей памяти; создатель буфера также освобождает ее."""
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()